@@ -0,0 +1,128 @@
+import os
+import time
+from datetime import datetime
+
+# 🔧 กำหนดค่าหลัก
+TARGET_LATENCY_SEC = 0.35          # latency เป้าหมายต่อเฟรมที่ประมวลผล (YOLO + OCR)
+STRIDE_BOUNDS = (1, 10)            # ประมวลผลทุก N เฟรม (ต่ำสุด, สูงสุด)
+IMGSZ_CHOICES = [320, 416, 480, 640]   # ขนาด input ของ YOLO ที่เลือกได้ (ดู benchmark_models.py)
+QUEUE_HIGH = 50                    # งานอัปโหลดค้างเกินนี้ = ระบบโหลดหนัก
+SURGE_MIN_CROPS = 2                # crop ในเฟรมเดียวตั้งแต่นี้ และเกิน 2 เท่าของค่าเฉลี่ย = กลุ่มนักวิ่งเข้ามา
+SURGE_QUEUE_JUMP = 5               # คิวอัปโหลดเพิ่มขึ้นเท่านี้ในเฟรมเดียว = มีคนผ่านเป็นกลุ่ม
+IDLE_AFTER_SEC = 10.0              # ไม่เจอกล่องเลยนานเท่านี้ = ช่วงว่าง
+ADJUST_INTERVAL_SEC = 2.0          # ปรับค่าได้ไม่บ่อยกว่านี้
+EWMA_ALPHA = 0.3
+ADAPT_LOG_FILE = "adaptive_log.csv"
+
+
+class AdaptiveController:
+    """ปรับ stride / ขนาด input ของ YOLO ตาม latency และคิวที่วัดได้
+
+    - กลุ่มนักวิ่งเข้ามา (crop ต่อเฟรมหรือคิวพุ่ง): ลด stride ไปต่ำสุดทันที ไม่รอรอบปรับ
+    - latency เกินเป้า หรือคิวล้น: ลดขนาด input ก่อน แล้วค่อยเพิ่ม stride
+    - มีนักวิ่งผ่านและ latency เหลือ: ลด stride (ดูเฟรมถี่ขึ้น) แล้วค่อยคืนขนาด input
+    - ช่วงว่าง: เพิ่ม stride เพื่อประหยัด CPU
+    ทุกการปรับถูกบันทึกลง ADAPT_LOG_FILE
+
+    จำนวน OCR พร้อมกันไม่ได้ปรับที่นี่ - YOLO กับ OCR รันต่อกันใน thread เดียว
+    การจำกัด OCR จึงไม่ได้คืน core ให้ YOLO มีแต่ทำให้ crop ที่มาเป็นกลุ่มช้าลง
+    """
+
+    def __init__(self, initial_stride=5, initial_imgsz=640, target_latency=TARGET_LATENCY_SEC,
+                 stride_bounds=STRIDE_BOUNDS, imgsz_choices=IMGSZ_CHOICES, log_file=ADAPT_LOG_FILE):
+        self.target_latency = target_latency
+        self.stride_bounds = stride_bounds
+        self.imgsz_choices = sorted(imgsz_choices)
+        self.log_file = log_file
+
+        self.stride = min(max(initial_stride, stride_bounds[0]), stride_bounds[1])
+        self._imgsz_index = min(range(len(self.imgsz_choices)),
+                                key=lambda i: abs(self.imgsz_choices[i] - initial_imgsz))
+
+        self.latency = None
+        self.crops_per_frame = 0.0
+        self.queue_depth = 0
+        now = time.time()
+        self._last_activity = now
+        self._last_adjust = now
+        self.adjustments = 0
+
+        if log_file and not os.path.exists(log_file):
+            with open(log_file, "w") as f:
+                f.write("timestamp,reason,stride,imgsz,latency_ms,queue_depth,crops_per_frame\n")
+
+    @property
+    def imgsz(self):
+        return self.imgsz_choices[self._imgsz_index]
+
+    def observe(self, latency, queue_depth, crops):
+        """บันทึกผลของเฟรมที่ประมวลผล แล้วปรับค่าถ้าถึงรอบ คืน True ถ้ามีการปรับ"""
+        # เทียบกับค่าก่อนหน้า ก่อนที่ EWMA จะดูดซับเฟรมนี้
+        surge = ((crops >= SURGE_MIN_CROPS and crops > 2 * self.crops_per_frame)
+                 or queue_depth - self.queue_depth >= SURGE_QUEUE_JUMP)
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency
+        self.crops_per_frame = EWMA_ALPHA * crops + (1 - EWMA_ALPHA) * self.crops_per_frame
+        self.queue_depth = queue_depth
+
+        now = time.time()
+        if crops > 0:
+            self._last_activity = now
+        if surge and self.stride > self.stride_bounds[0]:
+            # ค่อยๆ ลดทีละขั้นต่อรอบจะใช้เวลาหลายวินาที - พลาดคนกลุ่มแรกไปแล้ว
+            before = (self.stride, self.imgsz)
+            self.stride = self.stride_bounds[0]
+            self._last_adjust = now
+            return self._changed("surge", before)
+        if now - self._last_adjust < ADJUST_INTERVAL_SEC:
+            return False
+        self._last_adjust = now
+        return self._adjust(now)
+
+    def _adjust(self, now):
+        before = (self.stride, self.imgsz)
+        reason = None
+        idle = now - self._last_activity > IDLE_AFTER_SEC
+
+        if self.latency > self.target_latency * 1.2 or self.queue_depth > QUEUE_HIGH:
+            reason = "overloaded"
+            if self._imgsz_index > 0:
+                self._imgsz_index -= 1
+            elif self.stride < self.stride_bounds[1]:
+                self.stride += 1
+        elif idle:
+            reason = "idle"
+            if self.stride < self.stride_bounds[1]:
+                self.stride += 1
+        elif self.latency < self.target_latency * 0.7:
+            reason = "headroom"
+            if self.stride > self.stride_bounds[0]:
+                self.stride -= 1
+            elif self._imgsz_index < len(self.imgsz_choices) - 1:
+                self._imgsz_index += 1
+
+        return self._changed(reason, before)
+
+    def _changed(self, reason, before):
+        after = (self.stride, self.imgsz)
+        if after == before:
+            return False
+
+        self.adjustments += 1
+        print(f"⚙️ Adaptive [{reason}]: stride {before[0]}->{after[0]}, imgsz {before[1]}->{after[1]} "
+              f"(latency {self.latency * 1000:.0f} ms, queue {self.queue_depth})")
+        self._log(reason)
+        return True
+
+    def _log(self, reason):
+        if not self.log_file:
+            return
+        try:
+            with open(self.log_file, "a") as f:
+                f.write(f"{datetime.now().strftime('%Y-%m-%dT%H:%M:%S')},{reason},{self.stride},{self.imgsz},"
+                        f"{self.latency * 1000:.1f},{self.queue_depth},"
+                        f"{self.crops_per_frame:.2f}\n")
+        except Exception as e:
+            print(f"⚠️ Cannot write adaptive log: {e}")
@@ -0,0 +1,155 @@
+from ultralytics import YOLO
+import cv2
+import os
+import glob
+import time
+import yaml
+
+# 🔧 กำหนดค่าหลัก
+DATA_YAML = "data.yaml"
+WEIGHTS_GLOB = "runs*/detect/*/weights/*.pt"
+IMAGE_SIZES = [320, 416, 480, 640]        # ขนาด input ที่จะทดสอบ
+EXPORT_FORMATS = ["pt", "onnx", "openvino"]  # pt = ใช้ weights ตรงๆ ไม่ต้อง export
+LATENCY_IMAGES = 50                       # จำนวนภาพที่ใช้วัด latency
+BATCH_SIZE = 8                            # batch N สำหรับวัด throughput
+WARMUP_RUNS = 3
+DEVICE = "cpu"
+
+
+def find_weights():
+    """หาไฟล์ weights ทั้งหมดใน runs*/detect/*/weights/"""
+    weights = sorted(glob.glob(WEIGHTS_GLOB))
+    if not weights:
+        print(f"❌ No weights found: {WEIGHTS_GLOB}")
+    return weights
+
+
+def load_val_images(limit):
+    """อ่าน path ของชุด validation จาก data.yaml แล้วโหลดภาพมาไว้ในหน่วยความจำ"""
+    with open(DATA_YAML, encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+
+    val_dir = os.path.join(data.get("path", ""), data["val"])
+    paths = sorted(glob.glob(os.path.join(val_dir, "*.jpg")) + glob.glob(os.path.join(val_dir, "*.png")))
+
+    images = []
+    for path in paths[:limit]:
+        img = cv2.imread(path)
+        if img is not None:
+            images.append(img)
+
+    print(f"✅ Loaded {len(images)} validation images from {val_dir}")
+    return images
+
+
+def export_model(weights, fmt, imgsz):
+    """export โมเดลเป็น format ที่ต้องการ (ONNX/OpenVINO ต้อง export แยกตาม imgsz)"""
+    if fmt == "pt":
+        return weights
+    try:
+        return YOLO(weights).export(format=fmt, imgsz=imgsz, device=DEVICE)
+    except Exception as e:
+        print(f"⚠️ Export {fmt} @ {imgsz} failed: {e}")
+        return None
+
+
+def measure_recall(model, imgsz):
+    """วัด precision/recall/mAP บนชุด validation"""
+    metrics = model.val(data=DATA_YAML, imgsz=imgsz, batch=1, device=DEVICE, verbose=False, plots=False)
+    return {
+        "precision": float(metrics.box.mp),
+        "recall": float(metrics.box.mr),
+        "map50": float(metrics.box.map50),
+    }
+
+
+def measure_latency(model, images, imgsz):
+    """วัด latency ต่อเฟรม (batch 1) และ throughput (batch N) บน CPU"""
+    for img in images[:WARMUP_RUNS]:
+        model.predict(img, imgsz=imgsz, device=DEVICE, verbose=False)
+
+    # batch 1 - แบบเดียวกับลูปกล้อง
+    latencies = []
+    for img in images:
+        start = time.perf_counter()
+        model.predict(img, imgsz=imgsz, device=DEVICE, verbose=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    # batch N - แบบเดียวกับการประมวลผลทั้งโฟลเดอร์
+    start = time.perf_counter()
+    for i in range(0, len(images), BATCH_SIZE):
+        model.predict(images[i:i + BATCH_SIZE], imgsz=imgsz, device=DEVICE, verbose=False)
+    batch_elapsed = time.perf_counter() - start
+
+    return {
+        "latency_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "fps_batch1": 1000.0 / (sum(latencies) / len(latencies)),
+        "fps_batchN": len(images) / batch_elapsed,
+    }
+
+
+def pareto_frontier(rows):
+    """เลือกเฉพาะ config ที่ไม่มีตัวอื่นทั้งเร็วกว่าและ recall สูงกว่า"""
+    frontier = []
+    best_recall = -1.0
+    for row in sorted(rows, key=lambda r: (r["latency_ms"], -r["recall"])):
+        if row["recall"] > best_recall:
+            frontier.append(row)
+            best_recall = row["recall"]
+    return frontier
+
+
+def print_table(title, rows):
+    print(f"\n📊 {title}")
+    print(f"{'weights':<45} {'fmt':<9} {'imgsz':>5} {'recall':>7} {'mAP50':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'fps@1':>7} {'fps@N':>7}")
+    for r in rows:
+        print(f"{r['weights']:<45} {r['format']:<9} {r['imgsz']:>5} {r['recall']:>7.3f} {r['map50']:>7.3f} "
+              f"{r['latency_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['fps_batch1']:>7.1f} {r['fps_batchN']:>7.1f}")
+
+
+def main():
+    print("🚀 Benchmarking detector candidates...")
+    print(f"   - Image sizes: {IMAGE_SIZES}")
+    print(f"   - Formats: {EXPORT_FORMATS}")
+    print(f"   - Batch N: {BATCH_SIZE}")
+
+    weights_list = find_weights()
+    if not weights_list:
+        return
+
+    images = load_val_images(LATENCY_IMAGES)
+    if not images:
+        print("❌ No validation images to benchmark")
+        return
+
+    rows = []
+    for weights in weights_list:
+        for imgsz in IMAGE_SIZES:
+            for fmt in EXPORT_FORMATS:
+                model_path = export_model(weights, fmt, imgsz)
+                if model_path is None:
+                    continue
+
+                print(f"🔍 {weights} [{fmt} @ {imgsz}]")
+                try:
+                    model = YOLO(model_path, task="detect")
+                    row = {"weights": weights, "format": fmt, "imgsz": imgsz}
+                    row.update(measure_recall(model, imgsz))
+                    row.update(measure_latency(model, images, imgsz))
+                    rows.append(row)
+                except Exception as e:
+                    print(f"❌ Benchmark error: {e}")
+
+    if not rows:
+        print("❌ No successful runs")
+        return
+
+    print_table("All configurations", sorted(rows, key=lambda r: r["latency_ms"]))
+    print_table("Pareto frontier (recall vs. latency)", pareto_frontier(rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+"""ระบบตรวจจับเลข bib นักวิ่ง - ทุกคำสั่งอยู่ใน ``bib.cli`` (``python -m bib --help``)"""
+
+from bib.config import load_config, DEFAULT_CONFIG
+
+__all__ = ["load_config", "DEFAULT_CONFIG"]
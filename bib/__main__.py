@@ -0,0 +1,5 @@
+import sys
+
+from bib.cli import main
+
+sys.exit(main())
@@ -0,0 +1,418 @@
+import cv2
+import os
+import time
+import signal
+import platform
+import tempfile
+import numpy as np
+
+from frame_ring import FrameRing
+from adaptive_controller import AdaptiveController
+from bib.stages import load_yolo, load_reader, close_reader, load_rules
+from bib.pipeline import RealtimePipeline
+from bib.sinks import make_sink, LocalSink
+
+running = True
+
+
+def signal_handler(sig, frame):
+    """จัดการ signal เพื่อปิดโปรแกรมอย่างปลอดภัย"""
+    global running
+    print("\n🛑 Received interrupt signal, shutting down safely...")
+    running = False
+
+
+def setup_camera(section):
+    """ตั้งค่ากล้องอย่างระมัดระวัง - แก้ปัญหา MSMF"""
+    cap = None
+
+    # ลองหลาย backend และหลายกล้อง
+    backends = [
+        cv2.CAP_DSHOW,    # DirectShow (Windows)
+        cv2.CAP_MSMF,     # Microsoft Media Foundation
+        cv2.CAP_V4L2,     # Video4Linux (Linux)
+        cv2.CAP_ANY       # Auto detect
+    ]
+
+    camera_indices = [section["index"]] if section["index"] is not None else [0, 1, 2]
+
+    for backend in backends:
+        for camera_idx in camera_indices:
+            try:
+                print(f"🔍 Trying camera {camera_idx} with backend {backend}")
+                cap = cv2.VideoCapture(camera_idx, backend)
+
+                if not cap.isOpened():
+                    if cap:
+                        cap.release()
+                    continue
+
+                # ตั้งค่ากล้องทีละขั้น
+                try:
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, section["width"])
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, section["height"])
+                    cap.set(cv2.CAP_PROP_FPS, section["fps"])
+                    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+                    # ให้เวลากล้องเตรียมตัว
+                    time.sleep(1)
+
+                    # ทดสอบอ่านเฟรม 3 ครั้ง
+                    success_count = 0
+                    for i in range(3):
+                        ret, test_frame = cap.read()
+                        if ret and test_frame is not None:
+                            success_count += 1
+                        time.sleep(0.1)
+
+                    if success_count >= 2:  # สำเร็จอย่างน้อย 2/3 ครั้ง
+                        print(f"✅ Camera {camera_idx} ready (backend: {backend})")
+                        print(f"📐 Resolution: {int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}")
+                        print(f"📊 FPS: {int(cap.get(cv2.CAP_PROP_FPS))}")
+                        return cap
+                    else:
+                        print(f"❌ Camera {camera_idx} can't read frames consistently")
+                        cap.release()
+                        cap = None
+
+                except Exception as setup_error:
+                    print(f"❌ Camera {camera_idx} setup error: {setup_error}")
+                    if cap:
+                        cap.release()
+                    cap = None
+                    continue
+
+            except Exception as e:
+                print(f"❌ Camera {camera_idx} backend {backend} error: {e}")
+                if cap:
+                    cap.release()
+                cap = None
+                continue
+
+    print("❌ No working camera found!")
+    print("💡 Try these solutions:")
+    print("   1. Check if camera is being used by another app")
+    print("   2. Try different USB port")
+    print("   3. Update camera drivers")
+    print("   4. Run as administrator")
+    print("   5. Check Windows Camera privacy settings")
+
+    return None
+
+
+def create_ring(cap):
+    """จองเฟรมล่วงหน้าเป็นริง (ถ้ากล้องไม่บอกขนาด ริงจะจองใหม่เองตามเฟรมแรก)"""
+    return FrameRing((int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 480,
+                      int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or 640, 3))
+
+
+class FrameScheduler:
+    """ตัดสินว่าเฟรมไหนต้องประมวลผล - ใช้ AdaptiveController ถ้าเปิด adaptive ไม่งั้นใช้ stride คงที่"""
+
+    def __init__(self, config, log_file="adaptive_log.csv"):
+        camera = config["camera"]
+        self.controller = None
+        self.stride = camera["stride"]
+        self.imgsz = config["detection"]["imgsz"]
+        if camera["adaptive"]:
+            self.controller = AdaptiveController(initial_stride=camera["stride"], initial_imgsz=self.imgsz,
+                                                 target_latency=camera["target_latency"],
+                                                 log_file=log_file)
+        self._since = 0
+
+    def due(self):
+        self._since += 1
+        if self._since >= self.stride:
+            self._since = 0
+            return True
+        return False
+
+    def observe(self, latency, queue_depth, crops):
+        if self.controller is None:
+            return
+        self.controller.observe(latency, queue_depth, crops)
+        self.stride = self.controller.stride
+        self.imgsz = self.controller.imgsz
+
+
+def run_camera(config):
+    """bib detect-camera: ตรวจจับ bib จากกล้องแบบ real-time แล้วส่งไปยัง sink"""
+    global running
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    print("🚀 Starting Enhanced Real-time BIB Detection System...")
+    print(f"📍 Checkpoint: {config['checkpoint']}")
+    print(f"🎯 Detection Settings:")
+    print(f"   - YOLO Confidence: {config['detection']['confidence']}")
+    print(f"   - OCR Confidence: {config['ocr']['confidence']}")
+    print(f"   - Min Tracking Frames: {config['confirm']['min_frames']}")
+    print(f"   - Process Every N Frames: {config['camera']['stride']}")
+    print(f"   - OCR Workers: {config['models']['ocr_workers']}")
+    print(f"   - Output: {config['output']['sink']}")
+    print(f"🖥️ Platform: {platform.system()} {platform.release()}")
+
+    if not os.path.exists(config["models"]["yolo"]):
+        print(f"❌ Missing required file: {config['models']['yolo']}")
+        return 1
+
+    rules = load_rules(config)
+    sink = make_sink(config)
+    if not sink.start():
+        print("❌ System initialization failed!")
+        sink.shutdown()
+        return 1
+
+    try:
+        model = load_yolo(config)
+        reader = load_reader(config)
+        print("✅ Models loaded successfully")
+    except Exception as e:
+        print(f"❌ Model loading error: {e}")
+        sink.shutdown()
+        return 1
+
+    pipeline = RealtimePipeline(config, model, reader, rules, sink)
+
+    cap = setup_camera(config["camera"])
+    if cap is None:
+        sink.shutdown()
+        close_reader(reader)
+        return 1
+
+    show = config["camera"]["show"]
+    print("🎯 Starting BIB detection...")
+    if show:
+        print("📝 Controls:")
+        print("   - Press 'q' to quit")
+        print("   - Press 'r' to reset detected bibs")
+        print("   - Press 'c' to clear tracking")
+
+    frame_ring = pipeline.frame_ring = create_ring(cap)
+    display = None  # บัฟเฟอร์สำหรับวาดผลและแสดงบนจอ (ใช้ซ้ำทุกเฟรม)
+    scheduler = FrameScheduler(config)
+
+    # ทุกโครงสร้างมีขนาดจำกัดอยู่แล้ว - monitor ไว้ยืนยันและหาจุดรั่ว
+    monitor = pipeline.create_memory_monitor(config["memory"])
+    monitor.start()
+
+    frame_count = 0
+    fps_time = time.time()
+    fps = 0
+
+    try:
+        while running:
+            ret, frame_ref, frame = frame_ring.read(cap)
+            if not ret or frame is None:
+                print("❌ Failed to read frame, retrying...")
+                time.sleep(0.1)
+
+                # ลองอ่านใหม่ 3 ครั้ง
+                retry_count = 0
+                while retry_count < 3 and running:
+                    time.sleep(0.2)
+                    ret, frame_ref, frame = frame_ring.read(cap)
+                    if ret and frame is not None:
+                        break
+                    retry_count += 1
+                    print(f"🔄 Retry reading frame {retry_count}/3")
+
+                if not ret or frame is None:
+                    print("❌ Camera connection lost, trying to reconnect...")
+                    cap.release()
+                    time.sleep(2)
+
+                    # ลองเชื่อมต่อกล้องใหม่
+                    cap = setup_camera(config["camera"])
+                    if cap is None:
+                        print("❌ Cannot reconnect camera, stopping...")
+                        break
+                    continue
+
+            frame_count += 1
+            current_time = time.time()
+
+            # วาดผลลงบัฟเฟอร์แสดงผล เฟรมดิบในริงไม่ถูกแก้ไข - ไม่แสดงผล (headless) ก็ไม่ต้องคัดลอก
+            if show:
+                if display is None or display.shape != frame.shape:
+                    display = np.empty_like(frame)
+                np.copyto(display, frame)
+
+            # ประมวลผลทุก N เฟรม (N ปรับตามโหลด)
+            if scheduler.due():
+                try:
+                    detect_start = time.perf_counter()
+                    crops = pipeline.process(frame, display, frame_ref, scheduler.imgsz)
+                    scheduler.observe(time.perf_counter() - detect_start, sink.pending(), crops)
+                except Exception as e:
+                    print(f"❌ Detection error: {e}")
+
+            # คำนวณ FPS
+            if current_time - fps_time >= 1.0:
+                fps = frame_count / (current_time - fps_time)
+                frame_count = 0
+                fps_time = current_time
+
+            # รายงานหน่วยความจำระยะๆ
+            monitor.maybe_report()
+
+            if not show:
+                continue
+
+            # แสดงข้อมูลสถิติ
+            confirmer = pipeline.confirmer
+            for i, text in enumerate([f"FPS: {fps:.1f}",
+                                      f"Detected: {len(confirmer.detected)}",
+                                      f"Tracking: {len(confirmer.tracking)}",
+                                      f"Queue: {sink.pending()}",
+                                      f"Every {scheduler.stride} @ {scheduler.imgsz}"]):
+                cv2.putText(display, text, (10, 30 * (i + 1)),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+            # แสดงผล
+            try:
+                cv2.imshow('BIB Detection System', display)
+            except cv2.error as cv_error:
+                print(f"❌ Display error: {cv_error}")
+                continue
+
+            # จัดการ keyboard input
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
+                break
+            elif key == ord('r'):
+                pipeline.reset_detected()
+                print("🔄 Reset detected bibs")
+            elif key == ord('c'):
+                pipeline.reset_tracking()
+                print("🔄 Clear tracking data")
+
+    except KeyboardInterrupt:
+        print("\n🛑 Keyboard interrupt received")
+    except Exception as e:
+        print(f"❌ Main loop error: {e}")
+    finally:
+        # ปิดระบบอย่างปลอดภัย
+        print("🔄 Shutting down system...")
+        running = False
+
+        if cap:
+            cap.release()
+        if show:
+            cv2.destroyAllWindows()
+
+        pipeline.report()
+        monitor.report()
+        monitor.stop()
+        close_reader(reader)
+
+        # รองานอัปโหลดที่ค้าง แล้วยกเลิกที่เหลือ
+        sink.shutdown()
+
+        print(f"📊 Frame ring: {frame_ring.stats()}")
+        frame = display = None
+        frame_ring.close()
+
+        detected = pipeline.confirmer.detected
+        print("🎉 System stopped safely")
+        print(f"📊 Total detected bibs: {len(detected)}")
+        if detected:
+            print(f"📝 Detected numbers: {sorted(int(x) for x in detected if x.isdigit())}")
+    return 0
+
+
+def run_soak(config, videos, hours, max_growth_mb, warmup_frames, report_interval):
+    """bib soak: เล่นวิดีโอซ้ำผ่านขั้นตอนเดียวกับกล้อง แล้วตรวจว่า RSS ไม่โตเกินกำหนด
+
+    ใช้ LocalSink ที่ encode JPEG แล้วลบทิ้ง ไม่ส่งอะไรขึ้น Firebase
+    คืนค่า 0 = ผ่าน, 1 = หน่วยความจำโตเกิน, 2 = ทดสอบไม่ได้
+    """
+    global running
+    signal.signal(signal.SIGINT, signal_handler)
+    print(f"🚀 Soak test: {hours:.1f} h of footage, max RSS growth {max_growth_mb:.0f} MB")
+
+    def open_video(path):
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            print(f"❌ Cannot open video: {path}")
+            return None, 0
+        return cap, cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    try:
+        model = load_yolo(config)
+        reader = load_reader(config)
+    except Exception as e:
+        print(f"❌ Model loading error: {e}")
+        return 2
+
+    video_index = 0
+    cap, fps = open_video(videos[video_index])
+    if cap is None:
+        close_reader(reader)
+        return 2
+
+    sink = LocalSink(os.path.join(tempfile.gettempdir(), "bib_soak"), keep_images=False, workers=4)
+    pipeline = RealtimePipeline(config, model, reader, load_rules(config), sink, create_ring(cap))
+    pipeline.stream.path = None  # ไม่เขียน detection stream ระหว่างทดสอบ
+    scheduler = FrameScheduler(config, log_file=None)
+    display = None
+
+    monitor = pipeline.create_memory_monitor(config["memory"])
+    monitor.interval = report_interval
+    monitor.log_file = "soak_memory_log.csv"
+    monitor.trace = True  # หา leak ต้องรู้บรรทัดที่จองเพิ่ม
+    monitor.start()
+
+    footage_sec = 0.0
+    frames = 0
+    start = time.time()
+    try:
+        while running and footage_sec < hours * 3600:
+            ret, frame_ref, frame = pipeline.frame_ring.read(cap)
+            if not ret or frame is None:
+                # จบไฟล์ - เล่นไฟล์ถัดไป (วนกลับไฟล์แรก)
+                cap.release()
+                video_index = (video_index + 1) % len(videos)
+                cap, fps = open_video(videos[video_index])
+                if cap is None:
+                    break
+                continue
+
+            frames += 1
+            footage_sec += 1.0 / fps
+            if display is None or display.shape != frame.shape:
+                display = np.empty_like(frame)
+            np.copyto(display, frame)
+
+            if scheduler.due():
+                detect_start = time.perf_counter()
+                crops = pipeline.process(frame, display, frame_ref, scheduler.imgsz)
+                scheduler.observe(time.perf_counter() - detect_start, sink.pending(), crops)
+
+            if frames == warmup_frames:
+                monitor.reset_baseline()
+                print("✅ Warm-up done, baseline RSS set")
+            monitor.maybe_report()
+    finally:
+        if cap is not None:
+            cap.release()
+        sink.shutdown()
+        close_reader(reader)
+        monitor.report()
+        monitor.stop()
+        frame = display = None
+        pipeline.frame_ring.close()
+
+    elapsed = time.time() - start
+    growth = monitor.growth()
+    print(f"📊 Replayed {footage_sec / 3600:.2f} h ({frames} frames) in {elapsed / 60:.1f} min, "
+          f"{sink.completed} detections saved")
+    if growth is None:
+        print("⚠️ Cannot measure RSS on this platform (install psutil)")
+        return 2
+    print(f"📊 RSS growth after warm-up: {growth / 1024 / 1024:.1f} MB (limit {max_growth_mb:.0f} MB)")
+    if growth > max_growth_mb * 1024 * 1024:
+        print("❌ Soak test FAILED: memory grew past the limit")
+        return 1
+    print("✅ Soak test passed")
+    return 0
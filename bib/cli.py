@@ -0,0 +1,112 @@
+import os
+import sys
+import argparse
+import multiprocessing
+
+import yaml
+
+from bib.config import load_config
+
+# ค่าเริ่มต้นของ bib soak
+SOAK_HOURS = 2.0            # ความยาวฟุตเทจที่เล่นซ้ำ (ชั่วโมงของวิดีโอ ไม่ใช่เวลาจริง)
+SOAK_MAX_GROWTH_MB = 200    # RSS โตเกินนี้หลัง warm-up = ไม่ผ่าน
+SOAK_WARMUP_FRAMES = 300    # เฟรมแรกที่ไม่นับ (โหลดโมเดล/จองบัฟเฟอร์/cache ของ torch)
+SOAK_REPORT_SEC = 300       # รายงานหน่วยความจำระหว่างทดสอบทุกกี่วินาที
+
+
+def cmd_detect_camera(config, args):
+    from bib.camera import run_camera
+    return run_camera(config)
+
+
+def cmd_detect_folder(config, args):
+    from bib.folder import run_folder
+    return run_folder(config)
+
+
+def cmd_train(config, args):
+    from ultralytics import YOLO
+    train = config["train"]
+    # ใช้ชุดข้อมูลที่รวม hard negatives ถ้า export ไว้แล้ว (ดู mine_hard_negatives.py)
+    data = train["data"] or ('data_hardneg.yaml' if os.path.exists('data_hardneg.yaml') else 'data.yaml')
+
+    print(f"CPU cores available: {multiprocessing.cpu_count()}")
+    print(f"🚀 Training {train['base_model']} on {data}")
+    model = YOLO(train["base_model"])
+    model.train(
+        data=data,
+        epochs=train["epochs"],
+        imgsz=train["imgsz"],
+        batch=train["batch"],
+        device=train["device"],
+        workers=train["workers"],
+        name=train["name"],
+        augment=train["augment"],
+    )
+    return 0
+
+
+def cmd_bench(config, args):
+    import benchmark_models
+    bench = config["bench"]
+    # benchmark_models อ่านค่าจากตัวแปรระดับ module - ตั้งจาก config ก่อนเรียก
+    benchmark_models.DATA_YAML = bench["data"]
+    benchmark_models.WEIGHTS_GLOB = bench["weights_glob"]
+    benchmark_models.IMAGE_SIZES = bench["image_sizes"]
+    benchmark_models.EXPORT_FORMATS = bench["formats"]
+    benchmark_models.LATENCY_IMAGES = bench["latency_images"]
+    benchmark_models.BATCH_SIZE = bench["batch_size"]
+    benchmark_models.DEVICE = bench["device"]
+    benchmark_models.main()
+    return 0
+
+
+def cmd_soak(config, args):
+    from bib.camera import run_soak
+    return run_soak(config, args.videos, args.hours, args.max_growth_mb, args.warmup_frames, args.report_interval)
+
+
+def cmd_import(config, args):
+    from bib.importer import run_import
+    return run_import(config, args.logs, args.image_dir)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bib", description="Running bib detection")
+    parser.add_argument("--config", help="YAML config file (default: bib.yaml if present)")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a config value, e.g. --set detection.confidence=0.5 (repeatable)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("detect-camera", help="real-time detection from a camera").set_defaults(func=cmd_detect_camera)
+    commands.add_parser("detect-folder", help="detect bibs in every image of a folder").set_defaults(func=cmd_detect_folder)
+    commands.add_parser("train", help="train the YOLO bib detector").set_defaults(func=cmd_train)
+    commands.add_parser("bench", help="benchmark detector weights/formats/sizes").set_defaults(func=cmd_bench)
+
+    imp = commands.add_parser("import", help="bulk-import offline bib_records*.csv logs and images into the backend")
+    imp.add_argument("logs", nargs="*", help="log files to import (default: every known bib_records*.csv)")
+    imp.add_argument("--image-dir", help="image folder of the given logs (default: the folder paired with a known log)")
+    imp.set_defaults(func=cmd_import)
+
+    soak = commands.add_parser("soak", help="replay footage through the camera pipeline and check memory growth")
+    soak.add_argument("videos", nargs="+", help="video files to replay in a loop")
+    soak.add_argument("--hours", type=float, default=SOAK_HOURS)
+    soak.add_argument("--max-growth-mb", type=float, default=SOAK_MAX_GROWTH_MB)
+    soak.add_argument("--warmup-frames", type=int, default=SOAK_WARMUP_FRAMES)
+    soak.add_argument("--report-interval", type=float, default=SOAK_REPORT_SEC)
+    soak.set_defaults(func=cmd_soak)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        config = load_config(args.config, args.overrides)
+    except (OSError, ValueError, KeyError, yaml.YAMLError) as e:
+        print(f"❌ Config error: {e}")
+        return 2
+    return args.func(config, args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
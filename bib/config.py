@@ -0,0 +1,170 @@
+import copy
+import os
+
+import yaml
+
+from bib_rules import BLACKLIST
+
+# ไฟล์ config ที่ใช้ถ้าไม่ได้ระบุ --config (อยู่ที่ root ของ repo)
+DEFAULT_CONFIG_FILE = "bib.yaml"
+
+# ค่าเริ่มต้นทั้งหมด - bib.yaml เขียนทับเฉพาะค่าที่ต้องการเปลี่ยน
+DEFAULT_CONFIG = {
+    "checkpoint": "cp3",             # จุดที่กล้อง/เครื่องนี้ตั้งอยู่ ใช้ในชื่อไฟล์ log และฟิลด์ <id>time
+    "models": {
+        "yolo": "runs/detect/bib_aug_yolo_default/weights/best.pt",
+        "ocr_languages": ["en"],
+        "ocr_workers": 4,            # 0 = ใช้ reader ใน process หลัก
+        "ocr_torch_threads": 1,
+        "ocr_quantize": True,        # recognizer int8 บน CPU
+        "ocr_cache_dir": "ocr_cache",  # reader ที่เตรียมแล้ว โหลดซ้ำเร็ว (None = สร้างใหม่ทุกครั้ง)
+        "ocr_start_method": "spawn",   # fork (Linux) = worker แชร์ weights กับ process หลักแบบ copy-on-write
+        "gpu": None,                 # None = ใช้ถ้ามี CUDA
+    },
+    "detection": {
+        "confidence": 0.6,
+        "imgsz": 640,
+        "padding": 5,
+        "min_crop_size": 20,
+        "roi": None,                 # [x1, y1, x2, y2] หรือ None = ทั้งเฟรม
+        "dedup_iou": 0.5,
+        "known_box_ttl": 1.0,        # วินาที: ส่งต่อเลขให้กล่องที่ซ้อนกับกล่องที่รู้เลขได้นานสุดเท่านี้หลัง OCR ล่าสุด
+        "known_box_reocr": 5,        # ส่งต่อเลขติดกันได้กี่เฟรม แล้วต้อง OCR กล่องนั้นใหม่
+    },
+    "dedup": {
+        # ข้าม YOLO + OCR ของภาพ/เฟรมที่แทบเหมือนภาพที่ประมวลผลล่าสุด
+        "folder": True,              # detect-folder: ภาพถ่ายรัวซ้ำๆ ข้ามได้คุ้ม
+        "camera": False,             # detect-camera: hash ทั้งเฟรม 9x8 แทบไม่เปลี่ยนเมื่อมีนักวิ่งเข้ามาในเฟรม
+        "method": "dhash",           # dhash | phash
+        "threshold": 4,              # Hamming distance จาก 64 bit
+        "max_reuse": 30,             # ใช้ผลเดิมซ้ำติดกันได้ไม่เกินนี้
+    },
+    "ocr": {
+        "confidence": 0.7,
+        "cascade": True,             # False = ใช้แค่ preprocessing แบบเร็ว
+        "recognize_first": True,     # อ่านแถวเลขด้วย recognize (ข้าม CRAFT) ก่อน readtext เต็ม
+        "max_escalations": 3,        # crop ต่อเฟรมที่ได้ลอง preprocessing เพิ่ม (None = ไม่จำกัด)
+        "variant_min_win_rate": 0.02,  # preprocessing ที่อ่านสำเร็จน้อยกว่านี้หลัง warm-up จะถูกข้าม
+    },
+    "rules": {
+        "blacklist": list(BLACKLIST),
+        "patterns": [],              # regex ของรูปแบบเลขที่ยอมรับ ([] = ตรวจแค่ช่วง)
+        "min_bib": 1,
+        "max_bib": 99999,
+        "lookalikes": True,          # แปลง O/I ที่อ่านผิดเป็น 0/1
+        "start_list": "start_list.csv",
+    },
+    "confirm": {
+        "min_frames": 2,
+        "min_frames_registered": 1,
+        "max_tracking": 100,
+        "repeat_after_sec": None,    # None = บันทึก bib ละครั้งต่อการรัน
+    },
+    "camera": {
+        "index": None,               # None = ลองหากล้องเอง
+        "width": 640,
+        "height": 480,
+        "fps": 15,
+        "stride": 5,                 # ประมวลผลทุก N เฟรม (ค่าเริ่มต้นของ adaptive)
+        "adaptive": True,
+        "target_latency": 0.35,
+        "show": True,
+    },
+    "output": {
+        "sink": "firebase",          # firebase | local
+        "image_dir": "bib_logs_{checkpoint}",
+        "log_file": "bib_records_{checkpoint}.csv",
+        "stream_dir": "detection_streams",
+    },
+    "firebase": {
+        "credential": "firebase_key.json",
+        "bucket": "detech-bib-running.firebasestorage.app",
+        "max_concurrency": 16,
+        "timeout": 30.0,
+    },
+    "bulk_import": {
+        "backend": "firebase",       # firebase | local (จำลองปลายทางใน local_dir)
+        "local_dir": "import_store",
+        "workers": 8,                # thread อัปโหลดภาพพร้อมกัน
+        "batch_size": 400,           # เอกสารต่อ batch (Firestore รับได้ไม่เกิน 500)
+        "state_file": "bulk_import_state.jsonl",
+        "report_interval": 10,
+    },
+    "folder": {
+        "input": "D:/Running",
+        "globs": ["*.jpg", "*.png"],
+        "output_dir": "predicted",
+        "confidence": 0.25,
+        "ocr": True,
+        "index": True,               # เพิ่มผลลง photo_index สำหรับค้นรูปด้วยเลข bib
+    },
+    "memory": {
+        "report_interval": 60,
+        "trace": False,              # tracemalloc ทำให้ loop กล้องช้า - soak-test เปิดเองเสมอ
+    },
+    "train": {
+        "base_model": "yolov8n.pt",
+        "data": None,                # None = data_hardneg.yaml ถ้ามี ไม่งั้น data.yaml
+        "epochs": 50,
+        "imgsz": 640,
+        "batch": 16,
+        "device": "cpu",
+        "workers": 6,
+        "name": "bib_aug_yolo_default",
+        "augment": True,
+    },
+    "bench": {
+        "data": "data.yaml",
+        "weights_glob": "runs*/detect/*/weights/*.pt",
+        "image_sizes": [320, 416, 480, 640],
+        "formats": ["pt", "onnx", "openvino"],
+        "latency_images": 50,
+        "batch_size": 8,
+        "device": "cpu",
+    },
+}
+
+
+def merge(base, override):
+    """รวม dict ซ้อนกัน - ค่าใน ``override`` ชนะ"""
+    result = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def apply_override(config, assignment):
+    """ใช้ ``section.key=value`` จาก --set (value อ่านแบบ YAML เช่น 0.5, true, [1, 2])"""
+    if "=" not in assignment:
+        raise ValueError(f"Invalid override (expected key=value): {assignment}")
+    path, raw = assignment.split("=", 1)
+    keys = path.strip().split(".")
+    node = config
+    for key in keys[:-1]:
+        if not isinstance(node.get(key), dict):
+            raise KeyError(f"Unknown config section: {path}")
+        node = node[key]
+    if keys[-1] not in node:
+        raise KeyError(f"Unknown config key: {path}")
+    node[keys[-1]] = yaml.safe_load(raw)
+
+
+def load_config(path=None, overrides=()):
+    """โหลดค่าเริ่มต้น -> ไฟล์ config -> --set ตามลำดับ"""
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    path = path or (DEFAULT_CONFIG_FILE if os.path.exists(DEFAULT_CONFIG_FILE) else None)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            config = merge(config, yaml.safe_load(f) or {})
+        print(f"✅ Config loaded: {path}")
+    for assignment in overrides:
+        apply_override(config, assignment)
+    return config
+
+
+def resolve_path(config, template):
+    """แทน ``{checkpoint}`` ในชื่อไฟล์/โฟลเดอร์"""
+    return template.format(checkpoint=config["checkpoint"]) if template else template
@@ -0,0 +1,88 @@
+import cv2
+import os
+import glob
+
+from photo_index import PhotoIndex
+from bib.stages import load_yolo, load_reader, close_reader, load_rules, load_dedup, Detector, BibReader, draw_box
+
+
+def list_images(section):
+    paths = []
+    for pattern in section["globs"]:
+        paths.extend(glob.glob(os.path.join(section["input"], pattern)))
+    return sorted(paths)
+
+
+def run_folder(config):
+    """bib detect-folder: ตรวจจับ bib ในภาพทุกภาพของโฟลเดอร์ บันทึกภาพที่วาดผลแล้ว และเพิ่มลง photo index"""
+    section = config["folder"]
+    image_paths = list_images(section)
+    if not image_paths:
+        print(f"❌ No images found in {section['input']} ({', '.join(section['globs'])})")
+        return 1
+
+    detector = Detector.from_config(load_yolo(config), {**config["detection"], "confidence": section["confidence"]})
+    reader = None
+    if section["ocr"]:
+        reader = BibReader.from_config(load_reader(config), load_rules(config), config["ocr"])
+
+    # สร้างโฟลเดอร์เก็บผลลัพธ์
+    os.makedirs(section["output_dir"], exist_ok=True)
+
+    # ภาพถ่ายรัวๆ (burst) ที่แทบเหมือนกัน ใช้ผล YOLO + OCR ของภาพก่อนหน้า
+    dedup = load_dedup(config, "folder")
+
+    # ดัชนี bib -> ภาพ สำหรับค้นรูปหลังงาน (python photo_index.py <bib>)
+    index = PhotoIndex() if section["ocr"] and section["index"] else None
+
+    found = 0
+    try:
+        for path in image_paths:
+            print(f"🔍 Predicting: {path}")
+            img = cv2.imread(path)
+            if img is None:
+                print(f"⚠️ Cannot read image: {path}")
+                continue
+
+            hit, cached, key = dedup.lookup(img) if dedup is not None else (False, None, None)
+            if hit:
+                plan, readings = cached
+                print("♻️ Near-duplicate of previous image, reusing its result")
+            else:
+                plan, _, _ = detector.detect(img, config["detection"]["imgsz"])
+                readings = reader.read(img, plan) if reader else [(None, 0, False, None)] * len(plan)
+                if dedup is not None:
+                    dedup.store(key, (plan, readings))
+
+            for row, (bib, conf, registered, variant) in zip(plan, readings):
+                if not reader:
+                    draw_box(img, row, (255, 0, 0), f"{float(row['score']):.2f}")
+                    continue
+                if bib is None:
+                    # อ่านเลขไม่ได้ ก็วาดกรอบเปล่า
+                    draw_box(img, row, (0, 0, 255))
+                    continue
+
+                found += 1
+                print(f"✅ BIB Detected: {bib} (Confidence: {conf:.2f})")
+                draw_box(img, row, (0, 255, 0), bib, scale=1.2)
+                if index is not None:
+                    index.add(path, bib, (row['bx1'], row['by1'], row['bx2'], row['by2']), conf)
+
+            # บันทึกภาพที่มีกรอบและเลข
+            out_path = os.path.join(section["output_dir"], os.path.basename(path))
+            cv2.imwrite(out_path, img)
+            print(f"💾 Saved: {out_path}\n")
+    finally:
+        if dedup is not None:
+            dedup.report("images")
+        if reader is not None:
+            reader.report()
+            close_reader(reader.reader)
+        if index is not None:
+            # รวม posting ใหม่เข้าดัชนีหลัก
+            index.compact()
+            index.close()
+
+    print(f"📊 {len(image_paths)} images, {found} bibs read")
+    return 0
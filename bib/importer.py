@@ -0,0 +1,345 @@
+import os
+import csv
+import glob
+import json
+import time
+import shutil
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bib.config import resolve_path
+
+# log จากการรันแบบ offline: (ไฟล์ csv, โฟลเดอร์ภาพ) - ไม่รู้ checkpoint ใช้ค่า checkpoint ใน config
+LOG_SOURCES = [
+    ("bib_records.csv", "bib_logs"),
+    ("bib_records1.csv", "bib_logs"),
+    ("bib_records2.csv", "bib_logs2"),
+]
+# log ของ bib CLI (output.sink=local): bib_records_<checkpoint>.csv คู่กับ bib_logs_<checkpoint>/
+CHECKPOINT_LOG_GLOB = "bib_records_*.csv"
+LOG_TIME_FORMAT = "%Y%m%d_%H%M%S"
+
+
+def log_sources(default_checkpoint=None):
+    """รายการ (ไฟล์ csv, โฟลเดอร์ภาพ, checkpoint) ของ log ทั้งหมดที่รู้จัก"""
+    sources = [(log_file, image_dir, default_checkpoint) for log_file, image_dir in LOG_SOURCES]
+    for log_file in sorted(glob.glob(CHECKPOINT_LOG_GLOB)):
+        checkpoint = os.path.splitext(log_file)[0][len("bib_records_"):]
+        sources.append((log_file, f"bib_logs_{checkpoint}", checkpoint))
+    return sources
+
+
+def iter_log_rows(sources):
+    """อ่าน log ทีละแถว (ไม่โหลดทั้งไฟล์) คืนค่า (key, เวลา, ข้อความ, path ภาพ, checkpoint)
+
+    ``key`` = ``<ไฟล์ log>#<บรรทัด>`` คงที่เพราะ log เขียนต่อท้ายอย่างเดียว ใช้จำว่านำเข้าแล้ว
+    """
+    for log_file, image_dir, checkpoint in sources:
+        if not os.path.exists(log_file):
+            print(f"⚠️ Log not found: {log_file}")
+            continue
+        with open(log_file, newline="", encoding="utf-8", errors="replace") as f:
+            for line_no, row in enumerate(csv.reader(f), 1):
+                if len(row) < 3:
+                    continue
+                # ชื่อไฟล์อยู่คอลัมน์สุดท้ายเสมอ ข้อความ OCR อาจมี ',' ปน
+                yield (f"{log_file}#{line_no}", row[0], ",".join(row[1:-1]),
+                       os.path.join(image_dir, row[-1]), checkpoint)
+
+
+def doc_id(checkpoint, bib):
+    """id เอกสารคงที่ต่อ (checkpoint, bib) - นำเข้าซ้ำจะเขียนทับเอกสารเดิม ไม่เพิ่มใหม่"""
+    return f"import_{checkpoint}_{bib}"
+
+
+class LocalBackend:
+    """ปลายทางจำลองบนเครื่อง ใช้ทดสอบก่อนส่งจริง: ภาพใน ``<root>/bibs/`` เอกสารใน ``<root>/runners.jsonl``"""
+
+    def __init__(self, root):
+        self.root = root
+        self.image_dir = os.path.join(root, "bibs")
+        self.docs_path = os.path.join(root, "runners.jsonl")
+        os.makedirs(self.image_dir, exist_ok=True)
+
+    def existing_keys(self):
+        keys = set()
+        if os.path.exists(self.docs_path):
+            with open(self.docs_path, encoding="utf-8") as f:
+                for line in f:
+                    doc = json.loads(line)
+                    keys.add((doc.get("checkpoint"), str(doc["bib_number"])))
+        return keys
+
+    def upload_image(self, path, name):
+        target = os.path.join(self.image_dir, name)
+        shutil.copyfile(path, target)
+        return os.path.abspath(target)
+
+    def write_batch(self, docs):
+        with open(self.docs_path, "a", encoding="utf-8") as f:
+            for id_, doc in docs:
+                f.write(json.dumps({"id": id_, **doc}, ensure_ascii=False) + "\n")
+
+    def close(self):
+        pass
+
+
+class FirestoreBackend:
+    """Firestore + Storage ชุดเดียวกับ FirebaseService แต่เขียนเอกสารทีละ batch"""
+
+    def __init__(self, credential_path, bucket_name, timeout=30.0):
+        from firebase_admin import firestore
+        from firebase_service import init_firebase
+        self.firestore = firestore
+        self.db, self.bucket = init_firebase(credential_path, bucket_name)
+        self.timeout = timeout
+
+    def existing_keys(self):
+        """(checkpoint, bib) ของเอกสารที่มีอยู่แล้ว - อ่านครั้งเดียวแทนการ query ทีละ bib"""
+        query = self.db.collection("runners").select(["bib_number", "checkpoint"])
+        keys = set()
+        for snapshot in query.stream(timeout=self.timeout):
+            doc = snapshot.to_dict()
+            if doc.get("bib_number") is not None:
+                keys.add((doc.get("checkpoint"), str(doc["bib_number"])))
+        return keys
+
+    def upload_image(self, path, name):
+        # ภาพใน log เป็น JPEG อยู่แล้ว อัปโหลดไฟล์ตรงๆ ไม่ต้อง decode/encode ใหม่
+        blob = self.bucket.blob(f'bibs/{name}')
+        blob.upload_from_filename(path, content_type="image/jpeg", timeout=self.timeout)
+        blob.make_public(timeout=self.timeout)
+        return blob.public_url
+
+    def write_batch(self, docs):
+        batch = self.db.batch()
+        collection = self.db.collection("runners")
+        for id_, doc in docs:
+            batch.set(collection.document(id_), {**doc, "processed_at": self.firestore.SERVER_TIMESTAMP})
+        batch.commit(timeout=self.timeout)
+
+    def close(self):
+        pass
+
+
+def make_backend(config):
+    """สร้างปลายทางตาม ``bulk_import.backend``"""
+    section = config["bulk_import"]
+    if section["backend"] == "firebase":
+        fb = config["firebase"]
+        return FirestoreBackend(fb["credential"], fb["bucket"], fb["timeout"])
+    if section["backend"] == "local":
+        return LocalBackend(resolve_path(config, section["local_dir"]))
+    raise ValueError(f"Unknown bulk_import.backend: {section['backend']}")
+
+
+class ImportState:
+    """จำ key ของแถวที่เขียนลงปลายทางแล้ว (JSONL ต่อท้ายทีละ batch) เพื่อรันต่อจากเดิมได้"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.done.update(json.loads(line)["keys"])
+                    except (ValueError, KeyError):
+                        continue  # บรรทัดสุดท้ายอาจเขียนไม่ครบถ้าโปรแกรมหยุดกลางทาง
+
+    def mark(self, keys):
+        self.done.update(keys)
+        if not self.path:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"time": time.time(), "keys": keys}) + "\n")
+
+
+class ImportStats:
+    """ตัวนับของการนำเข้า + รายงาน throughput"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.rows = 0
+        self.outcomes = Counter()
+        self.uploaded = 0
+        self.upload_bytes = 0
+        self.upload_time = 0.0
+        self.written = 0
+        self.batches = 0
+        self.write_time = 0.0
+        self._lock = threading.Lock()
+
+    def add_upload(self, nbytes, seconds):
+        with self._lock:
+            self.uploaded += 1
+            self.upload_bytes += nbytes
+            self.upload_time += seconds
+
+    def report(self, final=False):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        print(f"{'📊' if final else '⏳'} {self.rows} rows in {elapsed:.1f}s ({self.rows / elapsed:.1f} rows/s) | "
+              f"uploaded {self.uploaded} ({self.uploaded / elapsed:.1f} img/s, "
+              f"{self.upload_bytes / elapsed / 1024 / 1024:.2f} MB/s) | "
+              f"written {self.written} in {self.batches} batches")
+        if not final:
+            return
+        if self.uploaded:
+            print(f"   avg upload {self.upload_time / self.uploaded * 1000:.0f} ms/img (per worker)")
+        if self.batches:
+            print(f"   avg batch write {self.write_time / self.batches * 1000:.0f} ms")
+        for outcome, count in self.outcomes.most_common():
+            print(f"   {outcome:<18} {count}")
+
+
+class BulkImporter:
+    """นำเข้า log เก่าเข้า backend: ตรวจเลขด้วย BibRules ชุดเดียวกับตอนตรวจจับสด ตัดซ้ำ อัปโหลดขนาน เขียนทีละ batch
+
+    - แถวที่ (checkpoint, bib) มีอยู่แล้วในปลายทางหรือซ้ำกับแถวก่อนหน้าถูกข้าม (เก็บครั้งแรกที่เห็น เหมือนตอนสด)
+    - อัปโหลดภาพใน thread pool ``workers`` ตัว โดยมีงานค้างไม่เกิน ``workers * 4`` (อ่าน log แบบ stream)
+    - เอกสารสะสมครบ ``batch_size`` จึงเขียนครั้งเดียว แล้วบันทึก key ลง ``state`` -> รันซ้ำทำต่อจากเดิม
+    """
+
+    def __init__(self, backend, rules, state, workers=8, batch_size=400, report_interval=10.0):
+        self.backend = backend
+        self.rules = rules
+        self.state = state
+        self.workers = workers
+        self.batch_size = batch_size
+        self.report_interval = report_interval
+        self.stats = ImportStats()
+        self._seen = set()
+        self._batch = []
+
+    def prepare(self, key, time_str, text, image_path, checkpoint):
+        """ตรวจแถวเดียว คืนค่า (ผล, ข้อมูลสำหรับอัปโหลด หรือ None)"""
+        if key in self.state.done:
+            return "already_imported", None
+        bib, _, reason = self.rules.resolve(text)
+        if bib is None:
+            return f"rejected_{reason}", None
+        try:
+            detected_at = datetime.strptime(time_str.strip(), LOG_TIME_FORMAT)
+        except ValueError:
+            return "bad_timestamp", None
+        if (checkpoint, bib) in self._seen:
+            return "duplicate", None
+        if not os.path.exists(image_path):
+            return "missing_image", None
+        self._seen.add((checkpoint, bib))
+        return "queued", (key, bib, detected_at, image_path, checkpoint)
+
+    def _upload(self, key, bib, detected_at, image_path, checkpoint):
+        started = time.perf_counter()
+        name = f"{doc_id(checkpoint, bib)}_{os.path.basename(image_path)}"
+        image_url = self.backend.upload_image(image_path, name)
+        self.stats.add_upload(os.path.getsize(image_path), time.perf_counter() - started)
+        # ฟิลด์เดียวกับ FirebaseService._record_detection (log ไม่ได้เก็บความมั่นใจไว้)
+        doc = {
+            "bib_number": bib,
+            f"{checkpoint}time": detected_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "checkpoint": checkpoint,
+            "guntime": None,
+            "image_url": image_url,
+            "detection_confidence": None,
+            "detection_timestamp": detected_at.timestamp(),
+            "imported_from": key,
+        }
+        return key, doc_id(checkpoint, bib), doc
+
+    def _collect(self, future):
+        try:
+            key, id_, doc = future.result()
+        except Exception as e:
+            # ไม่บันทึก key -> รันครั้งหน้าลองใหม่
+            self.stats.outcomes["upload_failed"] += 1
+            print(f"❌ Upload failed: {e}")
+            return
+        self._batch.append((key, id_, doc))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        started = time.perf_counter()
+        try:
+            self.backend.write_batch([(id_, doc) for _, id_, doc in self._batch])
+        except Exception as e:
+            self.stats.outcomes["write_failed"] += len(self._batch)
+            print(f"❌ Batch write failed ({len(self._batch)} docs): {e}")
+        else:
+            self.state.mark([key for key, _, _ in self._batch])
+            self.stats.written += len(self._batch)
+            self.stats.outcomes["imported"] += len(self._batch)
+        self.stats.write_time += time.perf_counter() - started
+        self.stats.batches += 1
+        self._batch = []
+
+    def run(self, rows):
+        existing = self.backend.existing_keys()
+        self._seen.update(existing)
+        print(f"📥 {len(existing)} existing records, {len(self.state.done)} rows imported by earlier runs")
+
+        in_flight = deque()
+        last_report = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="import") as executor:
+            try:
+                for row in rows:
+                    self.stats.rows += 1
+                    outcome, job = self.prepare(*row)
+                    if job is None:
+                        self.stats.outcomes[outcome] += 1
+                        continue
+                    in_flight.append(executor.submit(self._upload, *job))
+                    # เก็บผลตามลำดับ - งานค้างมีจำกัด หน่วยความจำคงที่ไม่ว่า log จะยาวแค่ไหน
+                    while len(in_flight) >= self.workers * 4 or (in_flight and in_flight[0].done()):
+                        self._collect(in_flight.popleft())
+                    if time.perf_counter() - last_report >= self.report_interval:
+                        self.stats.report()
+                        last_report = time.perf_counter()
+                while in_flight:
+                    self._collect(in_flight.popleft())
+            finally:
+                # หยุดกลางทาง (Ctrl+C) - เขียนส่วนที่อัปโหลดเสร็จแล้วก่อนออก
+                for future in in_flight:
+                    future.cancel()
+                for future in in_flight:
+                    if future.done() and not future.cancelled():
+                        self._collect(future)
+                self.flush()
+                self.stats.report(final=True)
+        return self.stats
+
+
+def run_import(config, log_files=(), image_dir=None):
+    """``bib import`` - นำเข้า log ที่ระบุ (ไม่ระบุ = ทุก log ที่รู้จัก) ตามส่วน ``bulk_import`` ใน config"""
+    from bib.stages import load_rules
+
+    section = config["bulk_import"]
+    sources = log_sources(config["checkpoint"])
+    if log_files:
+        known = {log_file: (folder, checkpoint) for log_file, folder, checkpoint in sources}
+        sources = []
+        for path in log_files:
+            if image_dir is None and path not in known:
+                print(f"❌ Unknown log {path} - pass --image-dir")
+                return 2
+            folder, checkpoint = known.get(path, (image_dir, config["checkpoint"]))
+            sources.append((path, image_dir or folder, checkpoint))
+
+    rules = load_rules(config)
+    backend = make_backend(config)
+    state = ImportState(resolve_path(config, section["state_file"]))
+    importer = BulkImporter(backend, rules, state, workers=section["workers"],
+                            batch_size=section["batch_size"], report_interval=section["report_interval"])
+    try:
+        stats = importer.run(iter_log_rows(sources))
+    except KeyboardInterrupt:
+        print("🛑 Import interrupted - run again to continue")
+        return 1
+    finally:
+        backend.close()
+    return 1 if stats.outcomes["upload_failed"] or stats.outcomes["write_failed"] else 0
@@ -0,0 +1,152 @@
+import time
+import threading
+import numpy as np
+
+from memory_budget import MemoryMonitor
+from bib.stages import Detector, BibReader, Confirmer, DetectionStream, draw_box, load_dedup
+
+
+def draw_overlay(display, overlay):
+    if display is None:
+        return
+    for row, color, label, offset, scale in overlay:
+        draw_box(display, row, color, label, label_offset=offset, scale=scale)
+
+
+class RealtimePipeline:
+    """ขั้นตอนต่อเฟรมของกล้อง: Detector -> BibReader -> Confirmer -> sink + detection stream
+
+    ตัดภาพจาก ``frame`` (เฟรมดิบในริง) และวาดผลลงบน ``display`` เท่านั้น (None = ไม่วาด)
+    bib ที่ยืนยันแล้วจะ pin เฟรมในริงไว้จนบันทึกภาพเสร็จ (คัดลอกเฉพาะเมื่อริงใกล้เต็ม)
+    """
+
+    def __init__(self, config, model, reader, rules, sink, frame_ring=None):
+        self.detector = Detector.from_config(model, config["detection"])
+        self.reader = BibReader.from_config(reader, rules, config["ocr"])
+        self.confirmer = Confirmer.from_config(config["confirm"])
+        self.dedup = load_dedup(config, "camera")
+        self.stream = DetectionStream.from_config(config)
+        self.sink = sink
+        self.frame_ring = frame_ring
+        self.known_boxes = []  # (กล่อง, bib, เวลาที่ OCR อ่านได้, จำนวนเฟรมที่ส่งต่อเลขมา) ของเฟรมล่าสุด
+        self.known_box_ttl = config["detection"].get("known_box_ttl", 1.0)
+        self.known_box_reocr = config["detection"].get("known_box_reocr", 5)
+        self.lock = threading.Lock()  # ป้องกัน race condition กับปุ่มรีเซ็ต
+
+    def process(self, frame, display, frame_ref, imgsz=None):
+        """ประมวลผลหนึ่งเฟรม คืนจำนวน crop ที่ส่งเข้า OCR (ใช้วัดโหลดใน AdaptiveController)"""
+        with self.lock:
+            if self.dedup is not None:
+                hit, overlay, key = self.dedup.lookup(frame)
+                if hit:
+                    # แทบเหมือนเฟรมที่ประมวลผลล่าสุด - ไม่มีหลักฐานใหม่ ไม่นับ vote ซ้ำ แค่วาดผลเดิม
+                    draw_overlay(display, overlay)
+                    return 0
+
+            overlay = []  # (แถวใน plan, สี, ข้อความ, ระยะข้อความ, ขนาดตัวอักษร) วาดทีเดียวตอนท้าย
+            # กล่องที่ OCR ไว้นานเกินไปหรือส่งต่อเลขมาหลายเฟรมแล้วต้องอ่านใหม่ - คนถัดไปที่วิ่งผ่านจุดเดิมจะได้ไม่รับเลขไป
+            now = time.monotonic()
+            known = [entry for entry in self.known_boxes
+                     if now - entry[2] <= self.known_box_ttl and entry[3] < self.known_box_reocr]
+            known_array = np.array([entry[0] for entry in known], dtype=np.int32).reshape(-1, 4)
+            plan, duplicates, too_small = self.detector.detect(frame, imgsz, known_array)
+            if too_small:
+                print(f"⚠️ {too_small} crops too small")
+
+            # กล่องที่ซ้อนกับ bib ที่บันทึกไปแล้ว - ไม่ต้อง OCR ซ้ำ
+            next_known = []
+            for row in duplicates:
+                _, bib, seen_at, carried = known[row['track']]
+                next_known.append(((int(row['bx1']), int(row['by1']), int(row['bx2']), int(row['by2'])),
+                                   bib, seen_at, carried + 1))
+                overlay.append((row, (0, 255, 0), f"BIB: {bib}", 10, 0.7))
+
+            for i, row in enumerate(plan):
+                score = float(row['score'])
+                color = (0, 255, 0) if score > 0.7 else (0, 255, 255)
+                overlay.append((row, color, f"Det {i+1}: {score:.2f}", 30, 0.5))
+
+            try:
+                readings = self.reader.read(frame, plan)
+            except Exception as ocr_error:
+                for row in plan:
+                    overlay.append((row, (0, 0, 255), "OCR Failed", 10, 0.5))
+                print(f"❌ OCR error: {ocr_error}")
+                readings = []
+
+            for row, (bib, ocr_conf, registered, variant) in zip(plan, readings):
+                if not bib:
+                    continue
+                score = float(row['score'])
+                if self.confirmer.vote(bib, registered):
+                    self._record(frame, frame_ref, bib, score, ocr_conf, variant)
+
+                detected = self.confirmer.is_detected(bib)
+                text_color = (0, 255, 0) if detected else (0, 0, 255)
+                overlay.append((row, text_color, f"BIB: {bib} ({self.confirmer.tracking[bib]})", 10, 0.7))
+                if detected:
+                    next_known.append(((int(row['bx1']), int(row['by1']), int(row['bx2']), int(row['by2'])),
+                                       bib, now, 0))
+
+            draw_overlay(display, overlay)
+            if self.dedup is not None:
+                self.dedup.store(key, overlay)
+
+            # จำตำแหน่งกล่องของ bib ที่บันทึกแล้ว ไว้ข้าม OCR ในเฟรมถัดไป
+            self.known_boxes[:] = next_known
+            self.confirmer.end_frame()
+            return len(plan)
+
+    def _record(self, frame, frame_ref, bib, score, ocr_conf, variant):
+        if self.frame_ring is not None and self.frame_ring.pin(frame_ref):
+            image = frame
+            on_done = lambda ref=frame_ref: self.frame_ring.release(ref)
+        else:
+            # คัดลอกผ่านริงเพื่อให้นับใน fallback_copies (ไม่มีริง/ช่องถูกเขียนทับแล้ว ใช้เฟรมที่มีอยู่)
+            image = self.frame_ring.copy(frame_ref) if self.frame_ring is not None else None
+            if image is None:
+                image = frame.copy()
+            on_done = None
+
+        detection_time = time.time()
+        self.stream.append(bib, detection_time, score)
+        try:
+            self.sink.submit_detection(bib, image, score, detection_time, on_done)
+            print(f"🎯 NEW BIB: {bib} (YOLO: {score:.2f}, OCR: {ocr_conf:.2f}, {variant})")
+        except OverflowError:
+            if on_done is not None:
+                on_done()
+            print("⚠️ Upload queue full, skipping...")
+
+    def reset_detected(self):
+        with self.lock:
+            self.confirmer.reset_detected()
+            self.known_boxes.clear()
+            if self.dedup is not None:
+                self.dedup.invalidate()
+
+    def reset_tracking(self):
+        with self.lock:
+            self.confirmer.reset_tracking()
+            self.known_boxes.clear()
+            if self.dedup is not None:
+                self.dedup.invalidate()
+
+    def report(self):
+        self.reader.report()
+        if self.dedup is not None:
+            self.dedup.report("frames")
+
+    def create_memory_monitor(self, section):
+        """เฝ้าโครงสร้างที่โตได้ระหว่างรันเทียบกับงบของแต่ละตัว"""
+        confirmer = self.confirmer
+        monitor = MemoryMonitor(interval=section["report_interval"], trace=section["trace"])
+        monitor.track("detected_bibs", lambda: len(confirmer.detected))
+        monitor.track("bib_tracking", lambda: len(confirmer.tracking), confirmer.max_tracking)
+        monitor.track("known_boxes", lambda: len(self.known_boxes))
+        monitor.track("upload_queue", self.sink.pending, self.sink.max_pending)
+        monitor.track("upload_image_mb", lambda: round(self.sink.pending_image_bytes() / 1024 / 1024, 1),
+                      round(self.sink.max_image_bytes / 1024 / 1024))
+        if self.frame_ring is not None:
+            monitor.track("pinned_frames", lambda: self.frame_ring.stats()["pinned_now"], self.frame_ring.slots)
+        return monitor
@@ -0,0 +1,90 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from firebase_service import FirebaseService, save_image_safely, MAX_PENDING, MAX_PENDING_IMAGE_MB
+from bib.config import resolve_path
+
+
+class LocalSink:
+    """บันทึก bib ลงเครื่อง (ภาพเต็มเฟรม + แถวใน CSV แบบเดียวกับ bib_records*.csv) ไม่ใช้ Firebase
+
+    มี API เดียวกับ FirebaseService (``submit_detection`` / ``pending`` / ``shutdown``)
+    ถ้า ``keep_images=False`` จะ encode JPEG แล้วลบทิ้ง (ใช้ตอน soak test)
+    """
+
+    def __init__(self, image_dir, log_file=None, keep_images=True, workers=2,
+                 max_pending=MAX_PENDING, max_image_bytes=MAX_PENDING_IMAGE_MB * 1024 * 1024):
+        self.image_dir = image_dir
+        self.log_file = log_file
+        self.keep_images = keep_images
+        self.max_pending = max_pending
+        self.max_image_bytes = max_image_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="local-sink")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._image_bytes = 0
+        self.completed = 0
+        self.failed = 0
+        os.makedirs(image_dir, exist_ok=True)
+
+    def start(self):
+        return True
+
+    def pending(self):
+        return self._pending
+
+    def pending_image_bytes(self):
+        return self._image_bytes
+
+    def submit_detection(self, bib_number, image, confidence, detection_time, on_done=None):
+        nbytes = image.nbytes if on_done is None else 0
+        with self._lock:
+            if self._pending >= self.max_pending or self._image_bytes + nbytes > self.max_image_bytes:
+                raise OverflowError("Local sink queue is full")
+            self._pending += 1
+            self._image_bytes += nbytes
+        return self._executor.submit(self._save, bib_number, image, confidence, detection_time, on_done, nbytes)
+
+    def _save(self, bib_number, image, confidence, detection_time, on_done, nbytes):
+        timestamp_str = datetime.fromtimestamp(detection_time).strftime("%Y%m%d_%H%M%S")
+        filename = f"{bib_number}_{timestamp_str}.jpg"
+        path = os.path.join(self.image_dir, filename)
+        ok = False
+        try:
+            ok = save_image_safely(image, path)
+        finally:
+            if on_done is not None:
+                on_done()
+            with self._lock:
+                self._image_bytes -= nbytes
+                self._pending -= 1
+                self.completed += ok
+                self.failed += not ok
+
+        if not self.keep_images:
+            if os.path.exists(path):
+                os.remove(path)
+            return ok
+        if ok and self.log_file:
+            with self._lock, open(self.log_file, "a") as f:
+                f.write(f"{timestamp_str},{bib_number},{filename}\n")
+            print(f"✅ Saved bib: {bib_number} (Confidence: {confidence:.2f})")
+        return ok
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        print(f"🔄 Local sink stopped (done: {self.completed}, failed: {self.failed})")
+
+
+def make_sink(config):
+    """สร้างปลายทางตาม ``output.sink``"""
+    output = config["output"]
+    if output["sink"] == "firebase":
+        fb = config["firebase"]
+        return FirebaseService(fb["credential"], fb["bucket"], config["checkpoint"],
+                               max_concurrency=fb["max_concurrency"], timeout=fb["timeout"])
+    if output["sink"] == "local":
+        return LocalSink(resolve_path(config, output["image_dir"]), resolve_path(config, output["log_file"]))
+    raise ValueError(f"Unknown output.sink: {output['sink']}")
@@ -0,0 +1,244 @@
+import cv2
+import os
+import json
+import time
+
+from bib_rules import BibRules
+from start_list import StartList
+from box_plan import detections_to_array, build_crop_plan
+from ocr_pool import OcrPool
+from ocr_reader import create_reader, format_stats
+from ocr_cascade import OcrCascade, FAST_VARIANT, ESCALATION_VARIANTS, RECOGNIZE_VARIANT, VARIANT_MIN_WIN_RATE
+from memory_budget import BoundedCounter
+from frame_hash import DuplicateFilter
+from bib.config import resolve_path
+
+
+def load_yolo(config):
+    from ultralytics import YOLO
+    model = YOLO(config["models"]["yolo"])
+    model.overrides['verbose'] = False  # ลด log
+    return model
+
+
+def load_reader(config):
+    """สร้าง OCR reader - CPU ใช้ OcrPool หลาย process, GPU ใช้ easyocr.Reader ตัวเดียว"""
+    models = config["models"]
+    use_gpu = models["gpu"]
+    if use_gpu is None:
+        use_gpu = cv2.cuda.getCudaEnabledDeviceCount() > 0
+    if models["ocr_workers"] > 0 and not use_gpu:
+        # CPU: แยก OCR ไปหลาย process เพื่อเลี่ยง GIL
+        reader = OcrPool(workers=models["ocr_workers"], torch_threads=models["ocr_torch_threads"],
+                         languages=models["ocr_languages"], quantize=models["ocr_quantize"],
+                         cache_dir=models["ocr_cache_dir"], start_method=models["ocr_start_method"])
+        reader.warmup()
+        return reader
+    stats = {}
+    reader = create_reader(models["ocr_languages"], gpu=use_gpu, quantize=models["ocr_quantize"],
+                           cache_dir=models["ocr_cache_dir"], stats=stats)
+    print(f"✅ OCR reader ready: {format_stats(stats)}")
+    return reader
+
+
+def close_reader(reader):
+    if isinstance(reader, OcrPool):
+        reader.close()
+
+
+def load_rules(config):
+    """สร้าง BibRules จากส่วน ``rules`` (โหลดรายชื่อผู้สมัครถ้ามีไฟล์)"""
+    rules = config["rules"]
+    start_list = None
+    path = rules["start_list"]
+    if path and os.path.exists(path):
+        try:
+            start_list = StartList.from_csv(path)
+        except Exception as e:
+            print(f"⚠️ Cannot load start list: {e}")
+    elif path:
+        print(f"⚠️ No start list ({path}), using pattern validation only")
+    return BibRules(blacklist=rules["blacklist"], patterns=rules["patterns"], min_bib=rules["min_bib"],
+                    max_bib=rules["max_bib"], lookalikes=rules["lookalikes"], start_list=start_list)
+
+
+def load_dedup(config, mode):
+    """DuplicateFilter จากส่วน ``dedup`` สำหรับ ``mode`` (folder | camera) - None ถ้าปิดไว้"""
+    section = config["dedup"]
+    if not section[mode]:
+        return None
+    return DuplicateFilter(section["method"], section["threshold"], section["max_reuse"])
+
+
+class Detector:
+    """YOLO -> แผนการตัดภาพ (กรอง/เผื่อขอบ/ตัดกล่องเล็ก/เทียบกล่องที่รู้เลขแล้ว)"""
+
+    def __init__(self, model, confidence, padding=5, min_size=20, roi=None, dedup_iou=0.5):
+        self.model = model
+        self.confidence = confidence
+        self.padding = padding
+        self.min_size = min_size
+        self.roi = roi
+        self.dedup_iou = dedup_iou
+
+    @classmethod
+    def from_config(cls, model, section):
+        return cls(model, section["confidence"], section.get("padding", 0), section.get("min_crop_size", 1),
+                   section.get("roi"), section.get("dedup_iou", 0.5))
+
+    def detect(self, image, imgsz=None, known_boxes=None):
+        """คืนค่า ``(plan, duplicates, too_small)`` แบบเดียวกับ build_crop_plan"""
+        kwargs = {"verbose": False}
+        if imgsz:
+            kwargs["imgsz"] = imgsz
+        results = self.model(image, **kwargs)[0]
+        return build_crop_plan(detections_to_array(results), image.shape, self.confidence,
+                               padding=self.padding, min_size=self.min_size, roi=self.roi,
+                               tracked_boxes=known_boxes, dedup_iou=self.dedup_iou)
+
+
+class BibReader:
+    """OCR crop ทั้งหมดของภาพ (ผ่าน cascade) แล้วตรวจด้วย BibRules"""
+
+    def __init__(self, reader, rules, confidence, cascade=True, recognize_first=True, max_escalations=None,
+                 min_win_rate=VARIANT_MIN_WIN_RATE):
+        self.reader = reader
+        self.rules = rules
+        self.confidence = confidence
+        variants = ESCALATION_VARIANTS if cascade else []
+        recognize = RECOGNIZE_VARIANT if recognize_first else None
+        self.cascade = OcrCascade(reader, self.choose, variants=variants, fast=FAST_VARIANT, recognize=recognize,
+                                  escalate=self.worth_escalating, max_escalations=max_escalations,
+                                  min_win_rate=min_win_rate)
+
+    @classmethod
+    def from_config(cls, reader, rules, section):
+        return cls(reader, rules, section["confidence"], section["cascade"], section["recognize_first"],
+                   section["max_escalations"], section["variant_min_win_rate"])
+
+    def choose(self, ocr_results):
+        """เลือก bib ที่ดีที่สุดจากผล OCR ของ crop หนึ่ง คืนค่า (bib, ความมั่นใจ, ตรงกับรายชื่อพอดีหรือไม่)"""
+        best_bib = None
+        best_confidence = 0
+        best_registered = False
+        for (bbox, text, conf) in ocr_results:
+            if conf > self.confidence:
+                bib, registered, _ = self.rules.resolve(text)
+                if bib and conf > best_confidence:
+                    best_bib = bib
+                    best_confidence = conf
+                    best_registered = registered
+        return best_bib, best_confidence, best_registered
+
+    def worth_escalating(self, ocr_results):
+        """crop ที่อ่านไม่ได้ควรลอง preprocessing อื่นต่อไหม - ต้องมีข้อความที่มีตัวเลขและไม่ติด blacklist"""
+        for (bbox, text, conf) in ocr_results:
+            _, _, reason = self.rules.resolve(text)
+            if reason not in ("no_text", "blacklist", "no_digits"):
+                return True
+        return False
+
+    def read(self, image, plan):
+        """คืนรายการ ``(bib, conf, registered, variant)`` ต่อแถวของ plan"""
+        crops = [image[row['y1']:row['y2'], row['x1']:row['x2']] for row in plan]
+        if not crops:
+            return []
+        return self.cascade.read_many(crops, paragraph=False)
+
+    def report(self):
+        self.cascade.report()
+
+
+class Confirmer:
+    """ยืนยัน bib เมื่อเห็นต่อเนื่องพอ และกันบันทึกซ้ำ
+
+    - นับจำนวนเฟรมที่เห็นแต่ละ bib (ไม่เห็นในเฟรมไหน ค่าลดลง 1)
+    - bib ที่ตรงกับรายชื่อพอดีใช้เกณฑ์ ``min_frames_registered``
+    - bib ที่บันทึกแล้วจะไม่ถูกยืนยันอีก จนผ่าน ``repeat_after_sec`` (None = ไม่ซ้ำเลย)
+      ``detected`` ไม่จำกัดขนาด - ทิ้ง bib เก่าเมื่อไรนักวิ่งคนนั้นจะถูกบันทึก/อัปโหลดซ้ำ (bib ละไม่กี่สิบ byte)
+    """
+
+    def __init__(self, min_frames=2, min_frames_registered=1, max_tracking=100, repeat_after_sec=None):
+        self.min_frames = min_frames
+        self.min_frames_registered = min_frames_registered
+        self.repeat_after_sec = repeat_after_sec
+        self.max_tracking = max_tracking
+        self.tracking = BoundedCounter(max_tracking)
+        self.detected = {}  # bib -> เวลาที่บันทึก
+        self._seen = set()
+
+    @classmethod
+    def from_config(cls, section):
+        return cls(section["min_frames"], section["min_frames_registered"], section["max_tracking"],
+                   section["repeat_after_sec"])
+
+    def is_detected(self, bib, now=None):
+        detected_at = self.detected.get(bib)
+        if detected_at is None:
+            return False
+        if self.repeat_after_sec is None:
+            return True
+        return (now or time.time()) - detected_at <= self.repeat_after_sec
+
+    def vote(self, bib, registered, now=None):
+        """นับ bib ที่อ่านได้ในเฟรมนี้ คืน True ถ้าเพิ่งถูกยืนยัน (ควรบันทึก)"""
+        now = now or time.time()
+        self._seen.add(bib)
+        self.tracking[bib] += 1
+        required = self.min_frames_registered if registered else self.min_frames
+        if self.tracking[bib] >= required and not self.is_detected(bib, now):
+            self.detected[bib] = now
+            return True
+        return False
+
+    def end_frame(self):
+        """ลดค่า tracking ของ bib ที่ไม่เห็นในเฟรมนี้"""
+        for bib in [b for b in self.tracking if b not in self._seen]:
+            self.tracking[bib] = max(0, self.tracking[bib] - 1)
+            if self.tracking[bib] == 0:
+                del self.tracking[bib]
+        self._seen = set()
+
+    def reset_detected(self):
+        self.detected.clear()
+
+    def reset_tracking(self):
+        self.tracking.clear()
+        self._seen = set()
+
+
+class DetectionStream:
+    """เขียน bib ที่ยืนยันแล้วลง JSONL ของ checkpoint (checkpoint_aggregator.py อ่านต่อท้ายไฟล์)"""
+
+    def __init__(self, stream_dir, checkpoint):
+        self.checkpoint = checkpoint
+        self.path = os.path.join(stream_dir, f"{checkpoint}.jsonl") if stream_dir else None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(resolve_path(config, config["output"]["stream_dir"]), config["checkpoint"])
+
+    def append(self, bib_number, detection_time, confidence):
+        if self.path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            event = {
+                "checkpoint": self.checkpoint,
+                "bib": str(bib_number),
+                "time": detection_time,
+                "confidence": round(float(confidence), 4)
+            }
+            with open(self.path, "a") as f:
+                f.write(json.dumps(event) + "\n")
+        except Exception as e:
+            print(f"⚠️ Cannot write detection stream: {e}")
+
+
+def draw_box(image, row, color, label=None, label_offset=10, scale=0.7):
+    """วาดกรอบเดิมจาก YOLO (bx1..by2) พร้อมข้อความ"""
+    x1, y1, x2, y2 = int(row['bx1']), int(row['by1']), int(row['bx2']), int(row['by2'])
+    cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
+    if label:
+        cv2.putText(image, label, (x1, y1 - label_offset), cv2.FONT_HERSHEY_SIMPLEX, scale, color, 2)
+
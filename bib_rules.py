@@ -0,0 +1,61 @@
+import re
+
+# คำที่เป็นโลโก้สปอนเซอร์หรือรุ่นอายุ ไม่ใช่เลข bib (ค่าเริ่มต้นของ rules.blacklist ใน bib/config.py)
+BLACKLIST = ['m40', 'f30', 'fun', 'run', 'sponsor', 'nike', 'qr', 'km']
+
+
+# ตัวอักษรที่ OCR มักอ่านสลับกับตัวเลข
+DIGIT_LOOKALIKES = str.maketrans({'O': '0', 'o': '0', 'I': '1', 'l': '1'})
+
+
+class BibRules:
+    """กฎตรวจเลข bib ชุดเดียวที่ทุกคำสั่งของ ``bib`` ใช้ (ตั้งค่าจากส่วน ``rules`` ใน config)
+
+    - ข้อความที่มีคำใน ``blacklist`` ถูกปฏิเสธ
+    - เก็บแค่ตัวเลข (แปลง O/I ที่อ่านผิดเป็น 0/1 ถ้า ``lookalikes``) แล้วตัด 0 นำหน้า
+    - ถ้ามี ``start_list`` จะแก้เลขให้เป็น bib ที่ลงทะเบียนที่ใกล้ที่สุด ไม่งั้นตรวจช่วงและ ``patterns``
+    """
+
+    def __init__(self, blacklist=BLACKLIST, patterns=(), min_bib=1, max_bib=99999,
+                 lookalikes=True, start_list=None):
+        self.blacklist = [b.lower() for b in blacklist]
+        self.patterns = [re.compile(p) for p in patterns]
+        self.min_bib = min_bib
+        self.max_bib = max_bib
+        self.lookalikes = lookalikes
+        self.start_list = start_list
+
+    def digits(self, text):
+        """ตัวเลขในข้อความ (ตัด 0 นำหน้า) - None ถ้าไม่มี"""
+        cleaned = ''.join(filter(str.isalnum, str(text).strip()))
+        if self.lookalikes:
+            cleaned = cleaned.translate(DIGIT_LOOKALIKES)
+        digits = ''.join(filter(str.isdigit, cleaned))
+        return (digits.lstrip('0') or '0') if digits else None
+
+    def is_valid(self, bib):
+        if not bib or not bib.isdigit() or not self.min_bib <= int(bib) <= self.max_bib:
+            return False
+        return not self.patterns or any(p.match(bib) for p in self.patterns)
+
+    def resolve(self, text):
+        """คืนค่า ``(bib, registered, reason)`` - ``registered`` คือเลขตรงกับรายชื่อพอดี"""
+        if not text or not str(text).strip():
+            return None, False, "no_text"
+        lowered = str(text).lower()
+        if any(bad in lowered for bad in self.blacklist):
+            return None, False, "blacklist"
+
+        digits = self.digits(text)
+        if digits is None:
+            return None, False, "no_digits"
+
+        if self.start_list is not None:
+            bib, distance = self.start_list.correct(digits)
+            if bib is None:
+                return None, False, "not_registered"
+            return str(bib), distance == 0, "ok"
+
+        if not self.is_valid(digits):
+            return None, False, "invalid"
+        return digits, False, "ok"
@@ -0,0 +1,90 @@
+import numpy as np
+
+# 🔧 ค่าเริ่มต้น (เท่ากับส่วน detection ใน bib/config.py)
+CROP_PADDING = 5
+MIN_CROP_SIZE = 20
+DEDUP_IOU = 0.5
+
+# หนึ่งแถวของแผนการตัดภาพ
+PLAN_DTYPE = np.dtype([
+    ("x1", "i4"), ("y1", "i4"), ("x2", "i4"), ("y2", "i4"),      # กรอบที่เผื่อขอบแล้ว ใช้ตัดภาพ
+    ("bx1", "i4"), ("by1", "i4"), ("bx2", "i4"), ("by2", "i4"),  # กรอบเดิมจาก YOLO ใช้วาด
+    ("score", "f4"),
+    ("priority", "f4"),
+    ("track", "i4"),   # index ใน tracked_boxes ที่ซ้อนทับ (-1 = กล่องใหม่)
+])
+
+
+def detections_to_array(results):
+    """แปลงผล YOLO เป็น NumPy (N, 6) ครั้งเดียว: x1, y1, x2, y2, score, class"""
+    data = results.boxes.data
+    if hasattr(data, "cpu"):
+        data = data.cpu().numpy()
+    return np.asarray(data, dtype=np.float32).reshape(-1, 6)
+
+
+def box_iou(a, b):
+    """IoU ระหว่างกล่องทุกคู่ a (N, 4) กับ b (M, 4) คืน (N, M)"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    a = a[:, None, :].astype(np.float32)
+    b = b[None, :, :].astype(np.float32)
+    ix1 = np.maximum(a[..., 0], b[..., 0])
+    iy1 = np.maximum(a[..., 1], b[..., 1])
+    ix2 = np.minimum(a[..., 2], b[..., 2])
+    iy2 = np.minimum(a[..., 3], b[..., 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+def build_crop_plan(detections, frame_shape, conf_threshold, padding=CROP_PADDING,
+                    min_size=MIN_CROP_SIZE, roi=None, tracked_boxes=None, dedup_iou=DEDUP_IOU):
+    """สร้างแผนการตัดภาพจากผล YOLO ด้วย array operation ทั้งหมด (ไม่วนทีละกล่อง)
+
+    ขั้นตอน: กรองความมั่นใจ -> กรอง ROI -> เผื่อขอบ + clamp -> ตัดกล่องเล็ก -> เทียบกับกล่องที่ track อยู่
+    -> เรียงตาม priority (ความมั่นใจ x ขนาด) แทนการตัดเหลือ 5 กล่องแรก
+
+    คืนค่า ``(plan, duplicates, too_small)``
+    - ``plan`` กล่องที่ต้อง OCR เรียงตาม priority
+    - ``duplicates`` กล่องที่ซ้อนทับกล่องที่รู้เลขแล้ว (ฟิลด์ ``track`` ชี้ไปยังกล่องนั้น) ไม่ต้อง OCR
+    - ``too_small`` จำนวนกล่องที่เล็กเกินไป
+    """
+    dets = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+    height, width = frame_shape[:2]
+
+    dets = dets[dets[:, 4] >= conf_threshold]
+
+    if roi is not None and len(dets):
+        rx1, ry1, rx2, ry2 = roi
+        cx = (dets[:, 0] + dets[:, 2]) / 2
+        cy = (dets[:, 1] + dets[:, 3]) / 2
+        dets = dets[(cx >= rx1) & (cx <= rx2) & (cy >= ry1) & (cy <= ry2)]
+
+    boxes = dets[:, :4].astype(np.int32)
+    padded = boxes + np.array([-padding, -padding, padding, padding], dtype=np.int32)
+    padded[:, [0, 2]] = np.clip(padded[:, [0, 2]], 0, width)
+    padded[:, [1, 3]] = np.clip(padded[:, [1, 3]], 0, height)
+
+    sizes = padded[:, 2:4] - padded[:, 0:2]
+    big_enough = (sizes[:, 0] >= min_size) & (sizes[:, 1] >= min_size)
+    too_small = int(np.count_nonzero(~big_enough))
+    dets, boxes, padded, sizes = dets[big_enough], boxes[big_enough], padded[big_enough], sizes[big_enough]
+
+    track = np.full(len(dets), -1, dtype=np.int32)
+    if tracked_boxes is not None and len(tracked_boxes) and len(dets):
+        iou = box_iou(boxes, np.asarray(tracked_boxes).reshape(-1, 4))
+        best = iou.argmax(axis=1)
+        matched = iou[np.arange(len(dets)), best] >= dedup_iou
+        track[matched] = best[matched]
+
+    rows = np.empty(len(dets), dtype=PLAN_DTYPE)
+    rows["x1"], rows["y1"], rows["x2"], rows["y2"] = padded.T
+    rows["bx1"], rows["by1"], rows["bx2"], rows["by2"] = boxes.T
+    rows["score"] = dets[:, 4]
+    rows["priority"] = dets[:, 4] * np.sqrt(sizes[:, 0].astype(np.float32) * sizes[:, 1])
+    rows["track"] = track
+
+    rows = rows[np.argsort(-rows["priority"], kind="stable")]
+    return rows[rows["track"] < 0], rows[rows["track"] >= 0], too_small
@@ -0,0 +1,246 @@
+import os
+import json
+import glob
+import time
+import threading
+import socketserver
+from bisect import bisect_left, insort
+from datetime import datetime
+
+# 🔧 กำหนดค่าหลัก
+CHECKPOINTS = ["cp1", "cp2", "cp3", "finish"]   # เรียงตามเส้นทางวิ่ง
+GUN_TIME = None             # เวลาปล่อยตัว "YYYY-MM-DDTHH:MM:SS" (None = ไม่คำนวณเวลารวม)
+STREAM_DIR = "detection_streams"   # โฟลเดอร์ JSONL ที่แต่ละจุดเขียน (ดู CHECKPOINT_ID)
+POLL_INTERVAL_SEC = 1.0
+SOCKET_HOST = "127.0.0.1"
+SOCKET_PORT = 9900
+DEFAULT_LEADERBOARD_SIZE = 10
+
+
+class SplitTable:
+    """ตารางเวลาผ่านจุดของนักวิ่งทุกคน อัปเดตทีละ event ไม่ต้องคำนวณใหม่ทั้งหมด
+
+    - ``_times[bib][cp]`` เวลาแรกที่ bib ผ่านจุด cp
+    - ``_furthest[bib]`` (ลำดับจุดที่ไกลที่สุด, เวลา) ของ bib
+    - ``_ranked[cp]`` รายการ (เวลา, bib) เรียงตามเวลา สำหรับอันดับและ leaderboard
+    """
+
+    def __init__(self, checkpoints=CHECKPOINTS, gun_time=None):
+        self.checkpoints = list(checkpoints)
+        self._order = {cp: i for i, cp in enumerate(self.checkpoints)}
+        self.gun_time = gun_time
+        self._times = {}
+        self._furthest = {}
+        self._ranked = {cp: [] for cp in self.checkpoints}
+        self._lock = threading.Lock()
+        self.events = 0
+        self.duplicates = 0
+
+    def ingest(self, event):
+        """รับ event {checkpoint, bib, time} คืน True ถ้าเป็นข้อมูลใหม่ - event ผิดรูปแบบคืน False"""
+        if not isinstance(event, dict):
+            return False
+        cp = event.get("checkpoint")
+        bib = str(event.get("bib", "")).strip()
+        if not isinstance(cp, str) or cp not in self._order or not bib:
+            return False
+        try:
+            t = float(event.get("time"))
+        except (TypeError, ValueError):
+            return False
+
+        with self._lock:
+            self.events += 1
+            splits = self._times.setdefault(bib, {})
+            previous = splits.get(cp)
+            if previous is not None:
+                if t >= previous:
+                    # กล้องเห็นคนเดิมซ้ำที่จุดเดิม - ใช้เวลาแรกสุด
+                    self.duplicates += 1
+                    return False
+                self._ranked[cp].pop(bisect_left(self._ranked[cp], (previous, bib)))
+
+            splits[cp] = t
+            insort(self._ranked[cp], (t, bib))
+
+            index = self._order[cp]
+            furthest = self._furthest.get(bib)
+            if furthest is None or index > furthest[0] or (index == furthest[0] and t < furthest[1]):
+                self._furthest[bib] = (index, t)
+            return True
+
+    def _elapsed(self, t):
+        return None if self.gun_time is None else round(t - self.gun_time, 1)
+
+    def where(self, bib):
+        """นักวิ่ง bib อยู่ที่จุดไหนล่าสุด พร้อมอันดับที่จุดนั้นและเวลาแต่ละช่วง"""
+        bib = str(bib)
+        with self._lock:
+            furthest = self._furthest.get(bib)
+            if furthest is None:
+                return None
+            index, t = furthest
+            cp = self.checkpoints[index]
+            rank = bisect_left(self._ranked[cp], (t, bib)) + 1
+            splits = self._times[bib]
+
+            segments = []
+            previous_t = self.gun_time
+            for name in self.checkpoints:
+                if name not in splits:
+                    continue
+                segments.append({
+                    "checkpoint": name,
+                    "time": datetime.fromtimestamp(splits[name]).strftime('%Y-%m-%dT%H:%M:%S'),
+                    "elapsed": self._elapsed(splits[name]),
+                    "split": None if previous_t is None else round(splits[name] - previous_t, 1),
+                })
+                previous_t = splits[name]
+
+        return {"bib": bib, "checkpoint": cp, "rank": rank, "splits": segments}
+
+    def leaderboard(self, size=DEFAULT_LEADERBOARD_SIZE, checkpoint=None):
+        """อันดับนักวิ่ง - ถ้าระบุ checkpoint ใช้อันดับที่จุดนั้น ไม่งั้นเรียงตามจุดที่ไกลที่สุดแล้วตามเวลา"""
+        rows = []
+        with self._lock:
+            if checkpoint is not None:
+                for t, bib in self._ranked.get(checkpoint, [])[:size]:
+                    rows.append({"rank": len(rows) + 1, "bib": bib, "checkpoint": checkpoint,
+                                 "elapsed": self._elapsed(t)})
+                return rows
+
+            # ไล่จากจุดท้ายสุดมาหน้า นับเฉพาะคนที่จุดนั้นเป็นจุดไกลสุดของเขา
+            for index in range(len(self.checkpoints) - 1, -1, -1):
+                cp = self.checkpoints[index]
+                for t, bib in self._ranked[cp]:
+                    if self._furthest[bib][0] != index:
+                        continue
+                    rows.append({"rank": len(rows) + 1, "bib": bib, "checkpoint": cp,
+                                 "elapsed": self._elapsed(t)})
+                    if len(rows) >= size:
+                        return rows
+        return rows
+
+    def summary(self):
+        with self._lock:
+            return {
+                "runners": len(self._times),
+                "events": self.events,
+                "duplicates": self.duplicates,
+                "per_checkpoint": {cp: len(self._ranked[cp]) for cp in self.checkpoints},
+            }
+
+
+class StreamTailer(threading.Thread):
+    """อ่าน JSONL ของทุกจุดแบบต่อท้ายไฟล์ (จำ offset ของแต่ละไฟล์ไว้)"""
+
+    def __init__(self, table, stream_dir=STREAM_DIR, interval=POLL_INTERVAL_SEC):
+        super().__init__(daemon=True)
+        self.table = table
+        self.stream_dir = stream_dir
+        self.interval = interval
+        self._offsets = {}
+        self.running = True
+
+    def poll(self):
+        new_events = 0
+        for path in glob.glob(os.path.join(self.stream_dir, "*.jsonl")):
+            offset = self._offsets.get(path, 0)
+            if os.path.getsize(path) <= offset:
+                continue
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # บรรทัดที่ยังเขียนไม่เสร็จ อ่านรอบหน้า
+                    offset += len(raw)  # ข้ามบรรทัดเสียไปเสมอ ไม่งั้นจะอ่านบรรทัดเดิมซ้ำทุกรอบ
+                    try:
+                        event = json.loads(raw)
+                        if not isinstance(event, dict):
+                            raise ValueError("not a JSON object")
+                        if self.table.ingest(event):
+                            new_events += 1
+                    except (ValueError, TypeError, AttributeError, KeyError):
+                        print(f"⚠️ Bad line in {path}: {raw[:80]!r}")
+            self._offsets[path] = offset
+        return new_events
+
+    def run(self):
+        while self.running:
+            try:
+                new_events = self.poll()
+                if new_events:
+                    print(f"📥 {new_events} new passings ({self.table.summary()['runners']} runners)")
+            except Exception as e:
+                print(f"❌ Stream read error: {e}")
+            time.sleep(self.interval)
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """โปรโตคอลแบบบรรทัดต่อบรรทัด
+
+    - บรรทัด JSON ``{"checkpoint": ..., "bib": ..., "time": ...}`` = ส่ง event เข้าระบบ
+    - ``WHERE <bib>`` / ``LEADER [n] [checkpoint]`` / ``STATS`` = คำถาม ตอบกลับเป็น JSON หนึ่งบรรทัด
+    """
+
+    def handle(self):
+        table = self.server.table
+        for raw in self.rfile:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            try:
+                if line.startswith("{"):
+                    reply = {"accepted": table.ingest(json.loads(line))}
+                else:
+                    parts = line.split()
+                    command = parts[0].upper()
+                    if command == "WHERE" and len(parts) == 2:
+                        reply = table.where(parts[1]) or {"error": "not seen"}
+                    elif command == "LEADER":
+                        size = int(parts[1]) if len(parts) > 1 else DEFAULT_LEADERBOARD_SIZE
+                        checkpoint = parts[2] if len(parts) > 2 else None
+                        reply = table.leaderboard(size, checkpoint)
+                    elif command == "STATS":
+                        reply = table.summary()
+                    else:
+                        reply = {"error": f"unknown command: {line}"}
+            except Exception as e:
+                reply = {"error": str(e)}
+            self.wfile.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+class AggregatorServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, table, address=(SOCKET_HOST, SOCKET_PORT)):
+        super().__init__(address, QueryHandler)
+        self.table = table
+
+
+def main():
+    gun_time = datetime.fromisoformat(GUN_TIME).timestamp() if GUN_TIME else None
+    table = SplitTable(CHECKPOINTS, gun_time)
+
+    print("🚀 Starting checkpoint aggregator...")
+    print(f"📍 Checkpoints: {' -> '.join(CHECKPOINTS)}")
+    print(f"📂 Streams: {STREAM_DIR}/*.jsonl")
+    print(f"🔌 Socket: {SOCKET_HOST}:{SOCKET_PORT} (WHERE <bib> | LEADER [n] [cp] | STATS)")
+
+    tailer = StreamTailer(table)
+    tailer.start()
+
+    server = AggregatorServer(table)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Keyboard interrupt received")
+    finally:
+        tailer.running = False
+        server.server_close()
+        print(f"📊 {table.summary()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,386 @@
+import cv2
+import os
+import time
+import uuid
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import firebase_admin
+from firebase_admin import credentials, storage, firestore
+
+# 🔧 กำหนดค่าหลัก
+MAX_CONCURRENT_REQUESTS = 16   # จำนวน request ที่ส่งพร้อมกันได้
+MAX_PENDING = 500              # จำนวนงานที่รอได้สูงสุด (กัน memory โตช่วงเข้าเส้นชัยพร้อมกัน)
+MAX_PENDING_IMAGE_MB = 256     # งบหน่วยความจำของเฟรมที่คัดลอกมารออัปโหลด
+REQUEST_TIMEOUT_SEC = 30.0     # timeout ต่อ request
+SHUTDOWN_GRACE_SEC = 5.0       # เวลารองานที่ค้างก่อนยกเลิกตอนปิด
+
+
+def get_temp_directory():
+    """สร้างและตรวจสอบ temp directory ที่เหมาะสม"""
+    try:
+        # ใช้ tempfile เพื่อหา temp directory ที่เหมาะสม
+        temp_dir = tempfile.gettempdir()
+
+        # สร้าง subdirectory สำหรับแอปนี้
+        app_temp_dir = os.path.join(temp_dir, "bib_detection")
+
+        # สร้าง directory ถ้ายังไม่มี
+        os.makedirs(app_temp_dir, exist_ok=True)
+
+        # ทดสอบการเขียนไฟล์
+        test_file = os.path.join(app_temp_dir, "test_write.tmp")
+        try:
+            with open(test_file, 'w') as f:
+                f.write("test")
+            os.remove(test_file)
+            print(f"✅ Temp directory ready: {app_temp_dir}")
+            return app_temp_dir
+        except:
+            # ถ้าเขียนไม่ได้ ใช้ current directory
+            print(f"⚠️ Cannot write to {app_temp_dir}, using current directory")
+            return os.path.join(os.getcwd(), "temp_images")
+    except Exception as e:
+        print(f"❌ Error setting up temp directory: {e}")
+        # fallback ไปใช้ current directory
+        fallback_dir = os.path.join(os.getcwd(), "temp_images")
+        os.makedirs(fallback_dir, exist_ok=True)
+        return fallback_dir
+
+def save_image_safely(image, file_path, max_retries=3):
+    """บันทึกภาพอย่างปลอดภัยพร้อม retry mechanism"""
+    if image is None or image.size == 0:
+        print("❌ Invalid image data")
+        return False
+
+    for attempt in range(max_retries):
+        try:
+            # ตรวจสอบว่า directory มีอยู่
+            directory = os.path.dirname(file_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+
+            # ปรับปรุงคุณภาพภาพก่อนบันทึก
+            if len(image.shape) == 3 and image.shape[2] == 3:  # BGR image
+                # เพิ่มความคมชัด
+                enhanced = cv2.convertScaleAbs(image, alpha=1.1, beta=5)
+
+                # บันทึกด้วยคุณภาพสูง
+                encode_params = [cv2.IMWRITE_JPEG_QUALITY, 95]
+                success = cv2.imwrite(file_path, enhanced, encode_params)
+            else:
+                success = cv2.imwrite(file_path, image)
+
+            if success and os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+                return True
+            else:
+                print(f"⚠️ Image save attempt {attempt + 1} failed (file not created or empty)")
+
+        except Exception as e:
+            print(f"⚠️ Image save attempt {attempt + 1} error: {e}")
+
+        # รอสักครู่ก่อน retry
+        if attempt < max_retries - 1:
+            time.sleep(0.1)
+
+    print(f"❌ Failed to save image after {max_retries} attempts: {file_path}")
+    return False
+
+
+def init_firebase(credential_path, bucket_name):
+    """initialize Firebase ครั้งเดียวต่อ process คืนค่า (firestore client, storage bucket)"""
+    # ตรวจสอบว่า Firebase ได้ initialize แล้วหรือยัง
+    try:
+        firebase_admin.get_app()
+        print("✅ Firebase already initialized")
+    except ValueError:
+        cred = credentials.Certificate(credential_path)
+        firebase_admin.initialize_app(cred, {
+            'storageBucket': bucket_name
+        })
+        print("✅ Firebase initialized successfully")
+
+    return firestore.client(), storage.bucket()
+
+
+class FirebaseService:
+    """จุดเดียวที่คุยกับ Firebase - รัน asyncio event loop ใน thread ของตัวเอง
+
+    thread ของกล้อง/วิเคราะห์ภาพเรียก ``submit_*`` ซึ่งคืน ``concurrent.futures.Future`` ทันที
+    การเรียก SDK (ซึ่งเป็นแบบ blocking) ถูกส่งไปรันใน thread pool ขนาดเท่ากับ concurrency limit
+    ใช้ client ชุดเดียวตลอด (connection ถูกใช้ซ้ำ) และทุก request มี timeout
+    (timeout แค่เลิกรอ thread ยังรันต่อ - ช่อง concurrency จะคืนเมื่อ thread ทำเสร็จจริง คิวของ pool จึงไม่โต)
+    """
+
+    def __init__(self, credential_path, bucket_name, checkpoint_id,
+                 max_concurrency=MAX_CONCURRENT_REQUESTS, timeout=REQUEST_TIMEOUT_SEC,
+                 max_image_bytes=MAX_PENDING_IMAGE_MB * 1024 * 1024):
+        self.credential_path = credential_path
+        self.bucket_name = bucket_name
+        self.checkpoint_id = checkpoint_id
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_image_bytes = max_image_bytes
+        self.max_pending = MAX_PENDING
+        self.db = None
+        self.bucket = None
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="firebase")
+        self._thread = threading.Thread(target=self._run_loop, name="firebase-loop", daemon=True)
+        self._semaphore = None
+        self._tasks = set()
+        self._pending = 0  # งานที่ส่งเข้า loop แล้วแต่ยังไม่เสร็จ (รวมที่ยังไม่เริ่ม)
+        self._pending_lock = threading.Lock()
+        self._temp_dir = None
+        self._image_bytes = 0
+        self._image_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.stuck_calls = 0  # SDK call ที่ timeout แล้วแต่ thread ยังไม่จบ
+
+    # ---------- lifecycle ----------
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._loop.run_forever()
+
+    def start(self):
+        """เริ่ม event loop และ initialize Firebase คืน True ถ้าพร้อมใช้งาน"""
+        self._thread.start()
+        try:
+            return asyncio.run_coroutine_threadsafe(self._init(), self._loop).result()
+        except Exception as e:
+            print(f"❌ Firebase initialization error: {e}")
+            return False
+
+    async def _init(self):
+        await self._call(self._init_sync)
+        self._temp_dir = await self._call(get_temp_directory)
+        return True
+
+    def _init_sync(self):
+        self.db, self.bucket = init_firebase(self.credential_path, self.bucket_name)
+
+    def shutdown(self, grace=SHUTDOWN_GRACE_SEC):
+        """รองานที่ค้างอยู่ไม่เกิน grace วินาที แล้วยกเลิกที่เหลือและหยุด loop"""
+        if not self._thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._drain(grace), self._loop).result(grace + 2)
+        except Exception as e:
+            print(f"⚠️ Firebase service shutdown: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        print(f"🔄 Firebase service stopped (done: {self.completed}, failed: {self.failed})")
+
+    async def _drain(self, grace):
+        tasks = list(self._tasks)
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, timeout=grace)
+        for task in pending:
+            task.cancel()
+        if pending:
+            print(f"⚠️ Cancelled {len(pending)} pending Firebase requests")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    # ---------- internal helpers ----------
+
+    async def _call(self, fn, *args):
+        """รันฟังก์ชัน SDK แบบ blocking ใน thread pool ภายใต้ concurrency limit และ timeout
+
+        ช่องของ semaphore ถูกถือไว้จน thread ทำงานเสร็จจริง แม้จะเลิกรอเพราะ timeout หรือถูกยกเลิกแล้ว
+        """
+        await self._semaphore.acquire()
+        future = self._loop.run_in_executor(self._executor, fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            print(f"⚠️ Firebase call {fn.__name__} timed out after {self.timeout:.0f}s, "
+                  f"its thread is still running ({self.stuck_calls + 1} stuck)")
+            raise
+        finally:
+            if future.done():
+                self._call_finished(future, stuck=False)
+            else:
+                self.stuck_calls += 1
+                future.add_done_callback(lambda f: self._call_finished(f, stuck=True))
+
+    def _call_finished(self, future, stuck):
+        """คืนช่อง concurrency เมื่อ thread ของ SDK จบแล้วจริงๆ"""
+        if stuck:
+            self.stuck_calls -= 1
+        if not future.cancelled():
+            future.exception()  # ผลของ call ที่เลิกรอแล้ว - ไม่ต้องเตือนว่าไม่มีใครอ่าน exception
+        self._semaphore.release()
+
+    def _submit(self, coro):
+        """ส่ง coroutine เข้า loop จาก thread อื่น (thread-safe)
+
+        นับงานตั้งแต่ตอนส่ง ไม่ใช่ตอน loop เริ่มรัน - งานที่ยังไม่เริ่มก็นับรวมใน ``max_pending`` และ ``pending()``
+        """
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                coro.close()
+                raise OverflowError("Firebase service queue is full")
+            self._pending += 1
+
+        async def tracked():
+            task = asyncio.current_task()
+            self._tasks.add(task)
+            try:
+                result = await coro
+                self.completed += 1
+                return result
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self._tasks.discard(task)
+
+        try:
+            future = asyncio.run_coroutine_threadsafe(tracked(), self._loop)
+        except Exception:
+            coro.close()
+            self._task_done(None)
+            raise
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, future):
+        with self._pending_lock:
+            self._pending -= 1
+
+    def pending(self):
+        """จำนวนงานที่ยังไม่เสร็จ (รวมงานที่ส่งแล้วแต่ loop ยังไม่เริ่ม)"""
+        return self._pending
+
+    def pending_image_bytes(self):
+        """หน่วยความจำของเฟรมที่คัดลอกมาและยังรอบันทึกลงดิสก์"""
+        return self._image_bytes
+
+    def _reserve_image(self, nbytes):
+        with self._image_lock:
+            if self._image_bytes + nbytes > self.max_image_bytes:
+                raise OverflowError("Firebase service image budget is full")
+            self._image_bytes += nbytes
+
+    def _release_image(self, nbytes):
+        with self._image_lock:
+            self._image_bytes -= nbytes
+
+    # ---------- blocking SDK calls (รันใน thread pool) ----------
+
+    def _bib_exists_sync(self, bib_number):
+        query = self.db.collection("runners").where(
+            filter=firestore.FieldFilter("bib_number", "==", str(bib_number))).limit(1)
+        return len(list(query.stream(timeout=self.timeout))) > 0
+
+    def _upload_blob_sync(self, local_path, filename):
+        blob = self.bucket.blob(f'bibs/{filename}')
+        blob.upload_from_filename(local_path, timeout=self.timeout)
+        blob.make_public(timeout=self.timeout)
+        return blob.public_url
+
+    def _add_doc_sync(self, doc_data):
+        self.db.collection("runners").add(doc_data, timeout=self.timeout)
+
+    # ---------- coroutines ----------
+
+    async def _bib_exists(self, bib_number):
+        try:
+            return await self._call(self._bib_exists_sync, bib_number)
+        except Exception as e:
+            print(f"❌ Error checking bib existence: {e}")
+            return False
+
+    async def _record_detection(self, bib_number, image, confidence, detection_time, on_done):
+        """ตรวจว่ามี bib แล้วหรือยัง ถ้ายังให้บันทึกภาพ อัปโหลด และเขียน Firestore"""
+        local_path = None
+        try:
+            if await self._bib_exists(bib_number):
+                print(f"⚠️ Bib {bib_number} already exists")
+                return False
+
+            # สร้างชื่อไฟล์
+            unique_id = str(uuid.uuid4())[:8]
+            filename = f"bib_{bib_number}_{int(detection_time)}_{unique_id}.jpg"
+            local_path = os.path.join(self._temp_dir, filename)
+
+            # บันทึกภาพชั่วคราว (encode JPEG ใน thread pool ไม่บล็อก loop)
+            success = await self._call(save_image_safely, image, local_path)
+            if not success:
+                print(f"❌ Failed to save temp image for bib {bib_number}")
+                return False
+
+            # ภาพอยู่บนดิสก์แล้ว ปล่อยเฟรมต้นฉบับได้
+            if on_done is not None:
+                on_done()
+                on_done = None
+
+            image_url = await self._call(self._upload_blob_sync, local_path, filename)
+
+            # บันทึกข้อมูลใน Firestore
+            doc_data = {
+                "bib_number": str(bib_number),
+                f"{self.checkpoint_id}time": datetime.fromtimestamp(detection_time).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                "checkpoint": self.checkpoint_id,
+                "guntime": None,
+                "image_url": image_url,
+                "detection_confidence": float(confidence),
+                "processed_at": firestore.SERVER_TIMESTAMP,
+                "detection_timestamp": detection_time
+            }
+            await self._call(self._add_doc_sync, doc_data)
+            print(f"✅ Uploaded bib: {bib_number} (Confidence: {confidence:.2f})")
+            return True
+
+        except asyncio.CancelledError:
+            print(f"⚠️ Upload cancelled for bib {bib_number}")
+            raise
+        except Exception as upload_error:
+            print(f"❌ Upload error for bib {bib_number}: {upload_error}")
+            raise
+        finally:
+            if on_done is not None:
+                on_done()
+            # ลบไฟล์ชั่วคราว
+            try:
+                if local_path and os.path.exists(local_path):
+                    os.remove(local_path)
+            except Exception as cleanup_error:
+                print(f"⚠️ Failed to cleanup temp file {local_path}: {cleanup_error}")
+
+    # ---------- thread-safe API ----------
+
+    def submit_bib_exists(self, bib_number):
+        return self._submit(self._bib_exists(bib_number))
+
+    def submit_detection(self, bib_number, image, confidence, detection_time, on_done=None):
+        """ส่ง bib ที่ยืนยันแล้วไปบันทึก - ``on_done`` ถูกเรียกเมื่อไม่ต้องใช้ ``image`` แล้ว
+
+        เฟรมที่ไม่มี ``on_done`` ถือเป็นสำเนาที่ service ถือไว้เอง และนับรวมใน ``max_image_bytes``
+        (เฟรมที่ pin ในริงไม่ได้จองหน่วยความจำเพิ่ม) เกินงบจะ raise ``OverflowError`` เหมือนคิวเต็ม
+        """
+        nbytes = image.nbytes if on_done is None else 0
+        self._reserve_image(nbytes)
+
+        def release(callback=on_done):
+            self._release_image(nbytes)
+            if callback is not None:
+                callback()
+
+        try:
+            return self._submit(self._record_detection(bib_number, image, confidence, detection_time, release))
+        except OverflowError:
+            self._release_image(nbytes)
+            raise
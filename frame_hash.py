@@ -0,0 +1,150 @@
+import cv2
+import os
+import sys
+import glob
+import numpy as np
+
+# 🔧 กำหนดค่าหลัก
+HASH_METHOD = "dhash"        # dhash (เร็ว) หรือ phash (ทนแสง/บีบอัดได้ดีกว่า)
+HASH_THRESHOLD = 4           # Hamming distance (จาก 64 bit) ที่ยังถือว่าเป็นภาพเดียวกัน
+MAX_REUSE = 30               # ใช้ผลเดิมซ้ำได้ติดกันไม่เกินนี้ แล้วบังคับประมวลผลใหม่
+ESTIMATE_THRESHOLDS = [0, 2, 4, 6, 8, 12]
+
+_DCT_SIZE = 32
+# เมทริกซ์ DCT-II 32x32 (คำนวณครั้งเดียว) - DCT 2 มิติ = D @ X @ D.T
+_DCT = np.cos(np.pi / _DCT_SIZE * (np.arange(_DCT_SIZE)[:, None]) * (np.arange(_DCT_SIZE)[None, :] + 0.5))
+
+
+def _gray(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def _to_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def dhash(image):
+    """difference hash 64 bit: ย่อเป็น 9x8 แล้วเทียบความสว่างพิกเซลติดกันในแนวนอน"""
+    small = cv2.resize(_gray(image), (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return _to_int(small[:, 1:] > small[:, :-1])
+
+
+def phash(image):
+    """perceptual hash 64 bit: DCT ของภาพ 32x32 เก็บความถี่ต่ำ 8x8 แล้วเทียบกับค่ามัธยฐาน"""
+    small = cv2.resize(_gray(image), (_DCT_SIZE, _DCT_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = (_DCT @ small @ _DCT.T)[:8, :8].ravel()
+    # ไม่นับ DC term (ความสว่างเฉลี่ย) ตอนหาค่ามัธยฐาน
+    return _to_int(low > np.median(low[1:]))
+
+
+HASHERS = {"dhash": dhash, "phash": phash}
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class DuplicateFilter:
+    """ข้าม YOLO + OCR ของภาพที่แทบเหมือนภาพล่าสุดที่ประมวลผลจริง แล้วใช้ผลเดิมแทน
+
+    เทียบกับ hash ของภาพที่ประมวลผลจริงครั้งล่าสุด (ไม่ใช่ภาพก่อนหน้า) เพื่อไม่ให้ค่อยๆ เลื่อนไปทีละนิด
+    ผลเดิมหมดอายุเมื่อขนาดภาพเปลี่ยน ระยะเกิน ``threshold`` หรือถูกใช้ซ้ำครบ ``max_reuse`` ครั้ง
+    """
+
+    def __init__(self, method=HASH_METHOD, threshold=HASH_THRESHOLD, max_reuse=MAX_REUSE):
+        self.hasher = HASHERS[method]
+        self.method = method
+        self.threshold = threshold
+        self.max_reuse = max_reuse
+        self._key = None
+        self._result = None
+        self._reused = 0
+        self.checks = 0
+        self.hits = 0
+
+    def lookup(self, image):
+        """คืน ``(hit, result, key)`` - ถ้า hit ใช้ ``result`` เดิมได้เลย ไม่งั้นประมวลผลแล้วเรียก ``store(key, ผลใหม่)``"""
+        return self.lookup_key((image.shape, self.hasher(image)))
+
+    def lookup_key(self, key):
+        """เหมือน ``lookup`` แต่รับ ``(shape, hash)`` ที่คำนวณไว้แล้ว"""
+        self.checks += 1
+        if (self._key is not None and self._reused < self.max_reuse and key[0] == self._key[0]
+                and hamming(key[1], self._key[1]) <= self.threshold):
+            self._reused += 1
+            self.hits += 1
+            return True, self._result, key
+        return False, None, key
+
+    def store(self, key, result):
+        self._key = key
+        self._result = result
+        self._reused = 0
+
+    def invalidate(self):
+        self._key = None
+        self._result = None
+
+    def saved_fraction(self):
+        return self.hits / self.checks if self.checks else 0.0
+
+    def report(self, label="inference calls"):
+        if not self.checks:
+            return
+        print(f"📊 Duplicate filter ({self.method} <= {self.threshold}): skipped {self.hits}/{self.checks} "
+              f"{label} ({self.saved_fraction():.1%})")
+
+
+def iter_images(source, stride=1):
+    """ภาพจากโฟลเดอร์ (เรียงตามชื่อ) หรือเฟรมจากวิดีโอ (ทุก ``stride`` เฟรม)"""
+    if os.path.isdir(source):
+        for path in sorted(glob.glob(os.path.join(source, "*.jpg")) + glob.glob(os.path.join(source, "*.png"))):
+            image = cv2.imread(path)
+            if image is not None:
+                yield image
+        return
+
+    cap = cv2.VideoCapture(source)
+    index = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % stride == 0:
+            yield frame
+        index += 1
+    cap.release()
+
+
+def main():
+    """ประเมินจากข้อมูลจริงว่า pre-filter จะข้าม inference ได้กี่เปอร์เซ็นต์ที่ threshold ต่างๆ
+
+    python frame_hash.py <โฟลเดอร์ภาพ | ไฟล์วิดีโอ> [stride]
+    """
+    if len(sys.argv) < 2:
+        print("Usage: python frame_hash.py <image folder | video> [stride]")
+        return
+    source = sys.argv[1]
+    stride = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    filters = [DuplicateFilter(method, threshold) for method in HASHERS for threshold in ESTIMATE_THRESHOLDS]
+    hashes = {method: None for method in HASHERS}
+    for image in iter_images(source, stride):
+        for method, hasher in HASHERS.items():
+            hashes[method] = (image.shape, hasher(image))
+        # ใช้ hash ที่คำนวณแล้วร่วมกันทุก threshold
+        for f in filters:
+            hit, _, key = f.lookup_key(hashes[f.method])
+            if not hit:
+                f.store(key, None)
+
+    if not filters[0].checks:
+        print(f"❌ No images read from {source}")
+        return
+    print(f"🔍 {filters[0].checks} images/frames from {source}")
+    for f in filters:
+        f.report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import numpy as np
+import threading
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+# 🔧 กำหนดค่าหลัก
+FRAME_RING_SLOTS = 16   # จำนวนเฟรมที่จองไว้ล่วงหน้า
+MIN_FREE_SLOTS = 2      # ต้องเหลือช่องที่ไม่ถูก pin อย่างน้อยเท่านี้ให้กล้องเขียนต่อได้
+
+# อ้างอิงเฟรมในริง - ใช้ได้ตราบที่ generation ยังตรงกับช่องนั้น
+FrameRef = namedtuple("FrameRef", ["slot", "generation"])
+
+
+class FrameRing:
+    """ริงบัฟเฟอร์ของเฟรมใน shared memory สำหรับส่งเฟรมระหว่างกล้องกับขั้นตอนวิเคราะห์โดยไม่คัดลอก
+
+    - ``read(cap)`` ให้กล้องเขียนลงช่องถัดไปโดยตรง (``cap.read(image=buf)``)
+    - ขั้นตอนถัดไปถือแค่ ``FrameRef`` (slot + generation) แทนการถือ array
+    - ``pin`` กันไม่ให้ช่องถูกเขียนทับระหว่างรอบันทึก ช่องที่ pin จะถูกข้าม
+    """
+
+    def __init__(self, shape, slots=FRAME_RING_SLOTS, dtype=np.uint8):
+        self._lock = threading.Lock()
+        self._shm = None
+        self._retired = []
+        self._generations = []
+        self.frames_read = 0
+        self.zero_copy_pins = 0
+        self.fallback_copies = 0
+        self.reallocations = 0
+        self._allocate(tuple(shape), slots, np.dtype(dtype))
+
+    def _allocate(self, shape, slots, dtype):
+        """จองหน่วยความจำก้อนเดียวสำหรับทุกช่อง"""
+        if self._shm is not None:
+            # ผู้เรียกอาจยังถือ view ของก้อนเดิมอยู่ - ลบชื่อทิ้งแต่เก็บไว้ปิดตอน close()
+            self._shm.unlink()
+            self._retired.append(self._shm)
+            self.reallocations += 1
+
+        self.shape = shape
+        self.slots = slots
+        self.dtype = dtype
+        size = int(np.prod(shape)) * dtype.itemsize * slots
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._frames = np.ndarray((slots,) + shape, dtype=dtype, buffer=self._shm.buf)
+        # generation ต่อจากของเดิม - FrameRef ที่ถือไว้ก่อนจองใหม่จะไม่ไปตรงกับเฟรมใหม่ในช่องเดียวกัน
+        start = max(self._generations, default=-1) + 1
+        self._generations = [start] * slots
+        self._pins = [0] * slots
+        self._next = 0
+
+    @property
+    def name(self):
+        """ชื่อ shared memory สำหรับให้ process อื่นเปิดอ่าน"""
+        return self._shm.name
+
+    def _claim_slot(self):
+        """เลือกช่องถัดไปที่ไม่ถูก pin แล้วเพิ่ม generation (อ้างอิงเก่าของช่องนั้นจะหมดอายุ)"""
+        with self._lock:
+            for _ in range(self.slots):
+                slot = self._next
+                self._next = (self._next + 1) % self.slots
+                if self._pins[slot] == 0:
+                    self._generations[slot] += 1
+                    return FrameRef(slot, self._generations[slot])
+        raise RuntimeError("All frame ring slots are pinned")
+
+    def read(self, cap):
+        """อ่านเฟรมจากกล้องลงช่องถัดไป คืนค่า (ret, ref, frame view)"""
+        ref = self._claim_slot()
+        buf = self._frames[ref.slot]
+        ret, frame = cap.read(image=buf)
+        if not ret or frame is None:
+            return False, None, None
+
+        if frame.ctypes.data != buf.ctypes.data:
+            # กล้องเปลี่ยนความละเอียด OpenCV จะจองใหม่เอง - จองริงใหม่ตามขนาดจริง
+            with self._lock:
+                if any(self._pins):
+                    # ยังมีเฟรมรอบันทึก คืนเฟรมที่กล้องให้มาตรงๆ ไปก่อน
+                    return True, None, frame
+                self._allocate(frame.shape, self.slots, frame.dtype)
+            ref = self._claim_slot()
+            buf = self._frames[ref.slot]
+            buf[...] = frame
+
+        self.frames_read += 1
+        return True, ref, buf
+
+    def get(self, ref):
+        """คืน view ของเฟรม หรือ None ถ้าช่องถูกเขียนทับไปแล้ว"""
+        if ref is None or self._generations[ref.slot] != ref.generation:
+            return None
+        return self._frames[ref.slot]
+
+    def pin(self, ref):
+        """กันช่องไว้ระหว่างรอบันทึก คืน False ถ้าช่องว่างเหลือน้อยเกินไป (ให้ผู้เรียกคัดลอกแทน)"""
+        with self._lock:
+            if ref is None or self._generations[ref.slot] != ref.generation:
+                return False
+            free = sum(1 for p in self._pins if p == 0)
+            if self._pins[ref.slot] == 0 and free <= MIN_FREE_SLOTS:
+                return False
+            self._pins[ref.slot] += 1
+            self.zero_copy_pins += 1
+            return True
+
+    def release(self, ref):
+        with self._lock:
+            if self._generations[ref.slot] == ref.generation and self._pins[ref.slot] > 0:
+                self._pins[ref.slot] -= 1
+
+    def copy(self, ref):
+        """คัดลอกเฟรมออกมา (ใช้เมื่อ pin ไม่ได้)"""
+        frame = self.get(ref)
+        if frame is None:
+            return None
+        self.fallback_copies += 1
+        return frame.copy()
+
+    def stats(self):
+        return {
+            "frames_read": self.frames_read,
+            "zero_copy_pins": self.zero_copy_pins,
+            "fallback_copies": self.fallback_copies,
+            "reallocations": self.reallocations,
+            "pinned_now": sum(1 for p in self._pins if p),
+            "ring_mb": self._shm.size / 1024 / 1024,
+        }
+
+    def close(self):
+        self._frames = None
+        self._shm.unlink()
+        for shm in self._retired + [self._shm]:
+            try:
+                shm.close()
+            except BufferError:
+                pass  # ยังมี view ค้างอยู่ หน่วยความจำจะถูกคืนตอนจบ process
@@ -0,0 +1,183 @@
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:  # psutil ไม่บังคับ - ใช้ /proc แทนบน Linux
+    psutil = None
+
+# 🔧 กำหนดค่าหลัก
+MEMORY_REPORT_INTERVAL_SEC = 60.0   # รายงานหน่วยความจำทุกกี่วินาที
+TRACEMALLOC_FRAMES = 1              # ความลึกของ traceback ที่เก็บ (มากขึ้น = แม่นขึ้นแต่ช้าลง)
+TOP_ALLOCATIONS = 5                 # จำนวนบรรทัดที่โตมากสุดที่แสดงในรายงาน
+MEMORY_LOG_FILE = "memory_log.csv"
+
+
+class BoundedCounter(dict):
+    """ตัวนับแบบ defaultdict(int) ที่จำกัดจำนวน key - เกินแล้วทิ้ง key ที่นับได้น้อยที่สุด
+
+    (เก็บแค่ bib ที่นับได้สูงสุด ทำทันทีตอนเขียนไม่ต้องรอรอบทำความสะอาด)
+    """
+
+    def __init__(self, maxlen):
+        super().__init__()
+        self.maxlen = maxlen
+        self.evictions = 0
+
+    def __missing__(self, key):
+        return 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if len(self) > self.maxlen:
+            # key ที่เพิ่งเขียนไม่ถูกทิ้ง - ไม่งั้น bib ใหม่จะไม่มีวันถูกนับ
+            victim = min((k for k in self if k != key), key=self.__getitem__)
+            del self[victim]
+            self.evictions += 1
+
+
+def rss_bytes():
+    """หน่วยความจำที่ process ใช้จริง (RSS) - None ถ้าวัดไม่ได้บนเครื่องนี้"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def private_bytes():
+    """หน่วยความจำที่เป็นของ process นี้คนเดียว (USS) - ไม่นับหน้าที่แชร์กับ process อื่น เช่น weights ที่ mmap/fork"""
+    if psutil is not None:
+        try:
+            return psutil.Process().memory_full_info().uss
+        except (psutil.AccessDenied, AttributeError):
+            pass
+    try:
+        total = 0
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    total += int(line.split()[1]) * 1024
+        return total
+    except OSError:
+        return None
+
+
+def format_mb(value):
+    return "n/a" if value is None else f"{value / 1024 / 1024:.1f} MB"
+
+
+class MemoryMonitor:
+    """รายงานหน่วยความจำเป็นระยะ: RSS, ขนาดโครงสร้างเทียบงบ, และบรรทัดที่จองหน่วยความจำเพิ่มขึ้นมากสุด
+
+    ``track(name, sizer, budget)`` ลงทะเบียนโครงสร้างที่ต้องเฝ้า (``sizer()`` คืนขนาดปัจจุบัน)
+    ``trace`` เปิด tracemalloc (hook ทุกการจองหน่วยความจำ ทำให้ loop หลักช้าลง) - ใช้ตอน soak test/หา leak
+    traceback เก็บแค่สั้นๆ และ snapshot ถูกถ่ายเฉพาะตอนรายงาน
+    """
+
+    def __init__(self, interval=MEMORY_REPORT_INTERVAL_SEC, trace=False, trace_frames=TRACEMALLOC_FRAMES,
+                 top=TOP_ALLOCATIONS, log_file=MEMORY_LOG_FILE):
+        self.interval = interval
+        self.trace = trace
+        self.trace_frames = trace_frames
+        self.top = top
+        self.log_file = log_file
+        self._tracked = {}
+        self._baseline = None
+        self._last_report = time.time()
+        self.baseline_rss = None
+        self.peak_rss = None
+        self.reports = 0
+
+    def track(self, name, sizer, budget=None):
+        self._tracked[name] = (sizer, budget)
+
+    def start(self):
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+        self.reset_baseline()
+        if self.log_file and not os.path.exists(self.log_file):
+            with open(self.log_file, "w") as f:
+                f.write("timestamp,rss_mb,traced_mb,traced_peak_mb,"
+                        + ",".join(self._tracked) + "\n")
+
+    def reset_baseline(self):
+        """ตั้งจุดอ้างอิงใหม่ (เช่น หลัง warm-up ที่โหลดโมเดลและจองบัฟเฟอร์เสร็จแล้ว)"""
+        self.baseline_rss = rss_bytes()
+        self.peak_rss = self.baseline_rss
+        if tracemalloc.is_tracing():
+            self._baseline = self._snapshot()
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def sample(self):
+        """วัด RSS อย่างเดียว (ถูก) - อัปเดต peak"""
+        rss = rss_bytes()
+        if rss is not None and (self.peak_rss is None or rss > self.peak_rss):
+            self.peak_rss = rss
+        return rss
+
+    def growth(self):
+        """RSS สูงสุดที่โตขึ้นจาก baseline (bytes)"""
+        if self.baseline_rss is None or self.peak_rss is None:
+            return None
+        return self.peak_rss - self.baseline_rss
+
+    def maybe_report(self):
+        now = time.time()
+        if now - self._last_report < self.interval:
+            return False  # ไม่อ่าน /proc ทุกเฟรม - วัด RSS เฉพาะตอนรายงาน
+        self._last_report = now
+        self.report()
+        return True
+
+    def report(self):
+        self.reports += 1
+        rss = self.sample()
+        sizes = {name: sizer() for name, (sizer, _) in self._tracked.items()}
+
+        print(f"🧠 Memory: RSS {format_mb(rss)} (baseline {format_mb(self.baseline_rss)}, "
+              f"peak {format_mb(self.peak_rss)})")
+        for name, (_, budget) in self._tracked.items():
+            limit = f"/{budget}" if budget is not None else ""
+            marker = " ⚠️ over budget" if budget is not None and sizes[name] > budget else ""
+            print(f"   - {name}: {sizes[name]}{limit}{marker}")
+
+        traced = peak = None
+        if tracemalloc.is_tracing():
+            traced, peak = tracemalloc.get_traced_memory()
+            print(f"   - traced: {format_mb(traced)} (peak {format_mb(peak)})")
+            if self._baseline is not None:
+                stats = self._snapshot().compare_to(self._baseline, "lineno")
+                for stat in [s for s in stats if s.size_diff > 0][:self.top]:
+                    frame = stat.traceback[0]
+                    print(f"   + {stat.size_diff / 1024:+.0f} KiB {os.path.basename(frame.filename)}:{frame.lineno}")
+
+        self._log(rss, traced, peak, sizes)
+
+    def _log(self, rss, traced, peak, sizes):
+        if not self.log_file:
+            return
+        mb = lambda v: "" if v is None else f"{v / 1024 / 1024:.1f}"
+        try:
+            with open(self.log_file, "a") as f:
+                f.write(f"{datetime.now().strftime('%Y-%m-%dT%H:%M:%S')},{mb(rss)},{mb(traced)},{mb(peak)},"
+                        + ",".join(str(sizes[name]) for name in self._tracked) + "\n")
+        except Exception as e:
+            print(f"⚠️ Cannot write memory log: {e}")
+
+    def stop(self):
+        if self.trace and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
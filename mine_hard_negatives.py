@@ -0,0 +1,253 @@
+from ultralytics import YOLO
+import cv2
+import os
+import csv
+import json
+import argparse
+import easyocr
+import yaml
+
+from bib.config import load_config
+from bib.importer import log_sources
+from bib.stages import load_rules
+
+# 🔧 กำหนดค่าหลัก
+YOLO_MODEL_PATH = "runs/detect/bib_aug_yolo_default/weights/best.pt"
+DATA_YAML = "data.yaml"
+HARDNEG_DATA_YAML = "data_hardneg.yaml"
+
+REVIEW_DIR = "review_queue"
+MANIFEST_FILE = os.path.join(REVIEW_DIR, "manifest.json")
+# สถานะของกล่องดูจากโฟลเดอร์ที่ไฟล์ crop อยู่ - รีวิวโดยย้ายไฟล์ระหว่างโฟลเดอร์
+STATUS_DIRS = ["pending", "negative", "bib"]
+
+EXPORT_DIR = "hard_negatives"
+
+HARVEST_CONF = 0.1       # เก็บทุกกล่องที่ YOLO เห็นตั้งแต่ค่านี้
+LOW_CONF = 0.5           # กล่องที่ต่ำกว่านี้ถือว่าน่าสงสัย ต้องรีวิว
+OCR_CONFIDENCE = 0.5
+
+
+def load_manifest():
+    if os.path.exists(MANIFEST_FILE):
+        with open(MANIFEST_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, MANIFEST_FILE)
+
+
+def iter_logged_frames():
+    """อ่าน log ทุกไฟล์ คืนค่า (path ภาพ, ข้อความที่ log ไว้) โดยไม่ซ้ำภาพ"""
+    seen = set()
+    for log_file, image_dir, _ in log_sources():
+        if not os.path.exists(log_file):
+            continue
+        with open(log_file, newline="", encoding="utf-8", errors="replace") as f:
+            for row in csv.reader(f):
+                if len(row) < 3:
+                    continue
+                # ชื่อไฟล์อยู่คอลัมน์สุดท้ายเสมอ ข้อความ OCR อาจมี ',' ปน
+                filename = row[-1]
+                image_path = os.path.join(image_dir, filename)
+                if image_path in seen or not os.path.exists(image_path):
+                    continue
+                seen.add(image_path)
+                yield image_path, ",".join(row[1:-1])
+
+
+def read_crop(reader, rules, crop):
+    """OCR crop แล้วตัดสินทีละข้อความด้วย BibRules ชุดเดียวกับลูปกล้อง (ข้อความไหนผ่านก็ได้ bib)
+
+    คืนค่า (ข้อความ, bib, เหตุผล)
+    """
+    texts = []
+    bib, reason = None, "no_text"
+    for bbox, text, ocr_conf in reader.readtext(crop):
+        if ocr_conf <= OCR_CONFIDENCE:
+            continue
+        texts.append(text.strip())
+        fragment_bib, _, fragment_reason = rules.resolve(text)
+        if fragment_bib is not None and bib is None:
+            bib, reason = fragment_bib, fragment_reason
+        elif bib is None:
+            reason = fragment_reason
+    return " ".join(texts), bib, reason
+
+
+def harvest(rules):
+    """รัน YOLO + OCR บนภาพจาก log แล้วเก็บกล่องที่ความมั่นใจต่ำหรือถูกปฏิเสธเข้าคิวรีวิว"""
+    for status in STATUS_DIRS:
+        os.makedirs(os.path.join(REVIEW_DIR, status), exist_ok=True)
+
+    model = YOLO(YOLO_MODEL_PATH)
+    reader = easyocr.Reader(['en'])
+    manifest = load_manifest()
+
+    new_frames = 0
+    queued = 0
+    for image_path, logged_text in iter_logged_frames():
+        if image_path in manifest:
+            continue
+
+        img = cv2.imread(image_path)
+        if img is None:
+            continue
+
+        results = model(img, conf=HARVEST_CONF, verbose=False)[0]
+        frame_key = os.path.splitext(os.path.basename(image_path))[0]
+        boxes = []
+        for i, box in enumerate(results.boxes):
+            conf = box.conf.item()
+            x1, y1, x2, y2 = box.xyxy[0].int().tolist()
+            crop = img[y1:y2, x1:x2]
+            if crop.size == 0:
+                continue
+
+            raw, bib, reason = read_crop(reader, rules, crop)
+            if conf < LOW_CONF:
+                reason = "low_conf"
+
+            entry = {
+                "id": f"{frame_key}_{i}",
+                "xyxy": [x1, y1, x2, y2],
+                "conf": round(conf, 4),
+                "text": raw,
+                "bib": bib,
+                "reason": reason,
+            }
+            # กล่องที่อ่านได้ถูกต้องและมั่นใจ ถือเป็น bib เลย ไม่ต้องรีวิว
+            if reason == "ok":
+                entry["status"] = "bib"
+            else:
+                entry["status"] = "pending"
+                cv2.imwrite(os.path.join(REVIEW_DIR, "pending", f"{entry['id']}.jpg"), crop)
+                queued += 1
+            boxes.append(entry)
+
+        manifest[image_path] = {
+            "logged_text": logged_text,
+            "width": img.shape[1],
+            "height": img.shape[0],
+            "boxes": boxes,
+        }
+        new_frames += 1
+
+        # บันทึกเป็นระยะ เผื่อหยุดกลางทาง
+        if new_frames % 20 == 0:
+            save_manifest(manifest)
+
+    save_manifest(manifest)
+    print(f"✅ Harvested {new_frames} new frames, {queued} boxes queued for review")
+    print(f"📝 Review: move crops from {REVIEW_DIR}/pending/ to negative/ or bib/")
+
+
+def sync_review_status(manifest):
+    """อัปเดตสถานะในแมนิเฟสต์ตามโฟลเดอร์ที่ผู้รีวิวย้ายไฟล์ไป"""
+    location = {}
+    for status in STATUS_DIRS:
+        folder = os.path.join(REVIEW_DIR, status)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            location[os.path.splitext(name)[0]] = status
+
+    for frame in manifest.values():
+        for entry in frame["boxes"]:
+            if entry["id"] in location:
+                entry["status"] = location[entry["id"]]
+
+
+def to_yolo_line(xyxy, width, height):
+    x1, y1, x2, y2 = xyxy
+    cx = (x1 + x2) / 2 / width
+    cy = (y1 + y2) / 2 / height
+    w = (x2 - x1) / width
+    h = (y2 - y1) / height
+    return f"0 {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}"
+
+
+def export():
+    """export crop ที่รีวิวแล้วเป็น dataset แบบ YOLO สำหรับ train_yolo.py รอบถัดไป
+
+    export เฉพาะ crop ไม่ใช่ทั้งภาพ - ภาพเต็มอาจมี bib จริงที่ YOLO ไม่เห็น (ต่ำกว่า HARVEST_CONF)
+    ซึ่งถ้าไม่มี label จะสอนโมเดลว่าเป็นพื้นหลัง
+    - crop ``negative`` = ภาพพื้นหลังล้วน (label ว่าง)
+    - crop ``bib`` ที่ผู้รีวิวยืนยัน (กฎปฏิเสธหรือความมั่นใจต่ำ) = กล่องเต็ม crop
+    """
+    manifest = load_manifest()
+    if not manifest:
+        print("❌ Review queue is empty, run harvest first")
+        return
+
+    sync_review_status(manifest)
+    save_manifest(manifest)
+
+    image_out = os.path.join(EXPORT_DIR, "images", "train")
+    label_out = os.path.join(EXPORT_DIR, "labels", "train")
+    os.makedirs(image_out, exist_ok=True)
+    os.makedirs(label_out, exist_ok=True)
+
+    exported = 0
+    negatives = 0
+    skipped = 0
+    for image_path, frame in manifest.items():
+        reviewed = [entry for entry in frame["boxes"] if entry["reason"] != "ok"]
+        skipped += sum(entry["status"] == "pending" for entry in reviewed)
+        reviewed = [entry for entry in reviewed if entry["status"] != "pending"]
+        if not reviewed:
+            continue
+        img = cv2.imread(image_path)
+        if img is None:
+            continue
+
+        for entry in reviewed:
+            x1, y1, x2, y2 = entry["xyxy"]
+            crop = img[y1:y2, x1:x2]
+            if crop.size == 0:
+                continue
+            name = f"{entry['id']}.jpg"
+            cv2.imwrite(os.path.join(image_out, name), crop)
+            with open(os.path.join(label_out, f"{entry['id']}.txt"), "w") as f:
+                if entry["status"] == "bib":
+                    f.write(to_yolo_line([0, 0, crop.shape[1], crop.shape[0]], crop.shape[1], crop.shape[0]) + "\n")
+                else:
+                    negatives += 1
+            exported += 1
+
+    # สร้าง data yaml ที่รวมชุด train เดิมกับ hard negatives
+    with open(DATA_YAML, encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    base = data.get("path", "")
+    data["train"] = [os.path.join(base, data["train"]), os.path.abspath(image_out)]
+    data["val"] = os.path.join(base, data["val"])
+    if "test" in data:
+        data["test"] = os.path.join(base, data["test"])
+    data.pop("path", None)
+    with open(HARDNEG_DATA_YAML, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+
+    print(f"✅ Exported {exported} reviewed crops ({negatives} confirmed negatives) to {EXPORT_DIR}/")
+    print(f"⏳ {skipped} crops still pending review")
+    print(f"📝 train_yolo.py will use {HARDNEG_DATA_YAML} on the next run")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hard-negative mining from detection logs")
+    parser.add_argument("command", choices=["harvest", "export"])
+    parser.add_argument("--config", help="ไฟล์ config ที่ใช้สร้างกฎเลข bib (ค่าเริ่มต้น bib.yaml)")
+    args = parser.parse_args()
+
+    if args.command == "harvest":
+        harvest(load_rules(load_config(args.config)))
+    else:
+        export()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+import cv2
+import os
+import sys
+import time
+import numpy as np
+
+from ocr_pool import ocr_many, load_bench_crops, BENCH_CROP_GLOB
+
+# 🔧 กำหนดค่าหลัก
+UPSCALE_MIN_HEIGHT = 64     # crop ที่เตี้ยกว่านี้จะถูกขยาย 2 เท่าในขั้น upscale
+DESKEW_MIN_ANGLE = 2.0      # เอียงน้อยกว่านี้ (องศา) ไม่ต้องหมุน
+CLAHE = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(4, 4))
+DIGIT_MIN_HEIGHT = 0.25     # ตัวอักษรที่เตี้ยกว่านี้ (สัดส่วนความสูง crop) ไม่ใช่เลข bib
+DIGIT_LINE_HEIGHT = 0.7     # ตัวที่สูงอย่างน้อยเท่านี้ของตัวที่สูงสุด = อยู่แถวเลข bib
+BENCH_CONFIDENCE = 0.7
+VARIANT_WARMUP = 50         # ลองครบเท่านี้ก่อนตัดสินว่า variant ไม่คุ้ม
+VARIANT_MIN_WIN_RATE = 0.02  # หลัง warm-up variant ที่อ่านสำเร็จน้อยกว่านี้จะถูกข้าม
+VARIANT_PROBE_EVERY = 50    # แต่ยังลอง variant ที่ถูกข้ามทุก N ครั้งที่เรียก read_many เผื่อสภาพแสงเปลี่ยน
+
+
+def to_gray(crop):
+    return cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+
+
+def variant_fast(crop):
+    """ทางปกติ: ขาวดำ + เพิ่ม contrast (ค่าเดิมของลูปกล้อง)"""
+    return cv2.convertScaleAbs(to_gray(crop), alpha=1.2, beta=10)
+
+
+def variant_deskew(crop):
+    """หมุนให้ตัวเลขตรง โดยหามุมจากกรอบเล็กสุดที่ครอบพิกเซลตัวอักษร"""
+    gray = to_gray(crop)
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    points = cv2.findNonZero(mask)
+    if points is None:
+        return None
+    angle = cv2.minAreaRect(points)[-1]
+    # OpenCV คืนมุมในช่วงต่างกันแล้วแต่เวอร์ชัน - แปลงให้อยู่ใน [-45, 45]
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    if abs(angle) < DESKEW_MIN_ANGLE:
+        return None
+    h, w = gray.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    rotated = cv2.warpAffine(gray, matrix, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+    return cv2.convertScaleAbs(rotated, alpha=1.2, beta=10)
+
+
+def variant_clahe(crop):
+    """ปรับ contrast เฉพาะจุด - ช่วยกรณีแสงสะท้อน/เงาครึ่ง bib"""
+    return CLAHE.apply(to_gray(crop))
+
+
+def variant_upscale(crop):
+    """ขยาย crop เล็กๆ ให้ตัวเลขใหญ่พอสำหรับ recognizer"""
+    gray = to_gray(crop)
+    if gray.shape[0] >= UPSCALE_MIN_HEIGHT:
+        return None
+    return cv2.resize(CLAHE.apply(gray), None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+
+
+def variant_binarize(crop):
+    """ขาวดำล้วนด้วย Otsu - ช่วยกรณีพื้นหลังลาย/สีใกล้ตัวเลข"""
+    blurred = cv2.GaussianBlur(to_gray(crop), (3, 3), 0)
+    _, binary = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+def digit_line_box(gray):
+    """หากรอบแถวเลข bib ใน crop: เลขคือตัวอักษรที่สูงที่สุดบน bib (ชื่อ/สปอนเซอร์ตัวเล็กกว่า)
+
+    คืน ``(x1, y1, x2, y2)`` หรือ None ถ้าหาไม่ได้ - ใช้ connected components แทน CRAFT (ไม่ถึง 1 ms)
+    """
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # ตัวเลขอาจเข้มบนพื้นอ่อนหรืออ่อนบนพื้นเข้ม - ให้ตัวอักษรเป็นฝั่งที่มีพิกเซลน้อยกว่า
+    if cv2.countNonZero(mask) > mask.size // 2:
+        mask = cv2.bitwise_not(mask)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    stats = stats[1:]
+    h, w = gray.shape
+    heights = stats[:, cv2.CC_STAT_HEIGHT]
+    widths = stats[:, cv2.CC_STAT_WIDTH]
+    chars = (heights >= h * DIGIT_MIN_HEIGHT) & (heights < h * 0.95) & (widths < heights * 1.5)
+    if not chars.any():
+        return None
+    chars &= heights >= heights[chars].max() * DIGIT_LINE_HEIGHT
+    line = stats[chars]
+    pad = int(heights[chars].max() * 0.2)
+    x1 = max(0, int(line[:, cv2.CC_STAT_LEFT].min()) - pad)
+    y1 = max(0, int(line[:, cv2.CC_STAT_TOP].min()) - pad)
+    x2 = min(w, int((line[:, cv2.CC_STAT_LEFT] + widths[chars]).max()) + pad)
+    y2 = min(h, int((line[:, cv2.CC_STAT_TOP] + heights[chars]).max()) + pad)
+    return x1, y1, x2, y2
+
+
+def variant_digit_line(crop):
+    """ขั้น recognize: ตัดเฉพาะแถวเลข (หาไม่เจอใช้ทั้ง crop) แล้วส่งเข้า recognizer ตรงๆ ไม่ผ่าน CRAFT"""
+    gray = variant_fast(crop)
+    box = digit_line_box(gray)
+    if box is None:
+        return gray
+    x1, y1, x2, y2 = box
+    return gray[y1:y2, x1:x2]
+
+
+RECOGNIZE_VARIANT = ("recognize", variant_digit_line)
+FAST_VARIANT = ("fast", variant_fast)
+ESCALATION_VARIANTS = [
+    ("deskew", variant_deskew),
+    ("clahe", variant_clahe),
+    ("upscale", variant_upscale),
+    ("binarize", variant_binarize),
+]
+
+
+class VariantStats:
+    def __init__(self):
+        self.attempts = 0
+        self.wins = 0
+        self.seconds = 0.0
+
+    def win_rate(self):
+        return self.wins / self.attempts if self.attempts else 0.0
+
+    def is_dead(self, min_win_rate, warmup=VARIANT_WARMUP):
+        """ลองมาพอแล้วแต่แทบไม่เคยอ่านสำเร็จ - ไม่คุ้มเสีย OCR call"""
+        return self.attempts >= warmup and self.win_rate() < min_win_rate
+
+    def payoff(self):
+        """โอกาสอ่านสำเร็จต่อเวลาที่ใช้ (ใช้เรียงลำดับขั้นที่จะลองก่อน)"""
+        win_rate = (self.wins + 1) / (self.attempts + 2)
+        avg_ms = (self.seconds * 1000 / self.attempts) if self.attempts else 1.0
+        return win_rate / max(avg_ms, 1e-3)
+
+
+class OcrCascade:
+    """OCR แบบขั้นบันได: ลองทางถูกก่อน แล้วค่อยลอง preprocessing ที่แพงกว่าเฉพาะ crop ที่ยังอ่านไม่ได้
+
+    ``choose(ocr_results)`` ของผู้เรียกตัดสินว่าผลอ่านใช้ได้หรือไม่ คืน ``(bib, conf, extra)``
+    หรือ ``(None, 0, None)`` - crop หยุดที่ขั้นแรกที่ได้ bib
+    ขั้นที่จ่ายคุ้ม (สำเร็จบ่อยต่อเวลา) จะถูกเลื่อนขึ้นมาลองก่อนอัตโนมัติ
+
+    ``recognize`` (ถ้ามี) เป็นขั้นแรกสุด: เรียก ``reader.recognize`` กับแถวเลขใน crop โดยข้าม CRAFT
+    (กล่อง YOLO บอกตำแหน่ง bib แล้ว) crop ที่ความมั่นใจไม่ถึงค่อยไปขั้น ``fast`` ที่ใช้ readtext เต็ม
+    ไม่จำกัดตัวอักษร (allowlist) - ไม่งั้นชื่อสปอนเซอร์ถูกอ่านเป็นตัวเลขที่ผ่านกฎ และ blacklist ไม่มีวันตรง
+
+    crop ที่อ่านไม่ได้ทุกขั้นเสีย OCR call ได้ถึง 2 + จำนวน variant จึงจำกัดไว้:
+    - ``escalate(ocr_results)`` (ถ้ามี) ตัดสินจากผลขั้นก่อน escalation ว่าควรลองต่อไหม
+      เช่น ข้อความติด blacklist หรือไม่มีตัวเลขเลย ก็ไม่ต้องลอง preprocessing อื่น
+    - variant ที่ลองครบ warm-up แล้วอ่านสำเร็จต่ำกว่า ``min_win_rate`` จะถูกข้าม (ลองซ้ำเป็นระยะ)
+    - ``max_escalations`` จำนวน crop สูงสุดต่อการเรียก ``read_many`` (ต่อเฟรม) ที่ได้ลอง escalation
+      เลือกตามลำดับ crop ที่ส่งมา (plan เรียงตาม priority แล้ว) - None = ไม่จำกัด
+    """
+
+    def __init__(self, reader, choose, variants=ESCALATION_VARIANTS, fast=FAST_VARIANT, recognize=None,
+                 escalate=None, max_escalations=None, min_win_rate=VARIANT_MIN_WIN_RATE):
+        self.reader = reader
+        self.choose = choose
+        self.escalate = escalate
+        self.max_escalations = max_escalations
+        self.min_win_rate = min_win_rate
+        self.fast = fast
+        self.recognize = recognize
+        self.variants = list(variants)
+        stages = [stage for stage in [recognize, fast] if stage] + self.variants
+        self.stats = {name: VariantStats() for name, _ in stages}
+        self.crops = 0
+        self.ocr_calls = 0
+        self.calls = 0
+        self.not_escalated = 0  # crop ที่ escalate() บอกว่าไม่คุ้มลองต่อ
+        self.capped = 0         # crop ที่เกิน max_escalations ของเฟรม
+
+    def _run_stage(self, name, fn, crops, indices, results, method="readtext", keep=None, **kwargs):
+        """รัน variant หนึ่งกับ crop ที่ยังไม่ได้ผล (OCR เป็น batch เพื่อใช้ OcrPool ได้)
+
+        ``keep(ocr_results)`` (ถ้ามี) คัด crop ที่อ่านไม่ได้และไม่ควรลองต่อออกจากรายการที่คืน
+        """
+        prepared = []
+        for i in indices:
+            image = fn(crops[i])
+            if image is not None:
+                prepared.append((i, image))
+        if not prepared:
+            return indices
+
+        stats = self.stats[name]
+        start = time.perf_counter()
+        batches = ocr_many(self.reader, [image for _, image in prepared], method=method, **kwargs)
+        stats.seconds += time.perf_counter() - start
+        stats.attempts += len(prepared)
+        self.ocr_calls += len(prepared)
+
+        done = set()
+        for (i, _), ocr_results in zip(prepared, batches):
+            bib, conf, extra = self.choose(ocr_results)
+            if bib is not None:
+                results[i] = (bib, conf, extra, name)
+                stats.wins += 1
+                done.add(i)
+            elif keep is not None and not keep(ocr_results):
+                self.not_escalated += 1
+                done.add(i)
+        return [i for i in indices if i not in done]
+
+    def read_many(self, crops, **kwargs):
+        """คืนรายการ ``(bib, conf, extra, variant)`` ต่อ crop - ``bib`` เป็น None ถ้าอ่านไม่ได้ทุกขั้น"""
+        self.crops += len(crops)
+        self.calls += 1
+        results = [(None, 0, None, None)] * len(crops)
+        pending = list(range(len(crops)))
+        # ขั้นสุดท้ายก่อน escalation เป็นตัวตัดสินว่า crop ไหนควรลองต่อ
+        keep = self.escalate if self.variants else None
+
+        if self.recognize:
+            name, fn = self.recognize
+            pending = self._run_stage(name, fn, crops, pending, results, method="recognize",
+                                      keep=None if self.fast else keep, **kwargs)
+
+        if self.fast:
+            name, fn = self.fast
+            pending = self._run_stage(name, fn, crops, pending, results, keep=keep, **kwargs)
+
+        if self.max_escalations is not None and len(pending) > self.max_escalations:
+            self.capped += len(pending) - self.max_escalations
+            pending = pending[:self.max_escalations]
+
+        probe = self.calls % VARIANT_PROBE_EVERY == 0
+        for name, fn in sorted(self.variants, key=lambda v: -self.stats[v[0]].payoff()):
+            if not pending:
+                break
+            if not probe and self.stats[name].is_dead(self.min_win_rate):
+                continue
+            pending = self._run_stage(name, fn, crops, pending, results, **kwargs)
+        return results
+
+    def report(self):
+        """สรุปว่าแต่ละขั้นคุ้มแค่ไหน"""
+        if not self.crops:
+            return
+        print(f"📊 OCR cascade: {self.crops} crops, {self.ocr_calls / self.crops:.2f} OCR calls/crop, "
+              f"{self.not_escalated} not worth escalating, {self.capped} over the per-frame cap")
+        for name, stats in self.stats.items():
+            if not stats.attempts:
+                print(f"   - {name:<9} not used")
+                continue
+            skipped = " (skipped)" if name in dict(self.variants) and stats.is_dead(self.min_win_rate) else ""
+            print(f"   - {name:<9} tried {stats.attempts:>6}, solved {stats.wins:>6} "
+                  f"({stats.win_rate():6.1%}), {stats.seconds * 1000 / stats.attempts:6.1f} ms/crop{skipped}")
+
+
+def load_labels(path):
+    """ไฟล์ csv ``ชื่อไฟล์ crop,เลข bib ที่ถูก`` (ไม่บังคับ)"""
+    labels = {}
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.strip().split(",")
+                if len(parts) >= 2:
+                    labels[parts[0]] = parts[1].strip()
+    return labels
+
+
+def main():
+    """เทียบ latency ต่อ crop และความแม่นยำ: readtext (เดิม) / recognize / recognize แล้ว fallback readtext
+
+    python ocr_cascade.py [labels.csv]  - ไม่มี labels จะวัดว่าอ่านได้ตรงกับ readtext กี่เปอร์เซ็นต์
+    """
+    from bib_rules import BibRules
+    from ocr_reader import create_reader
+
+    crops = load_bench_crops(with_names=True)
+    if not crops:
+        print(f"❌ No crops found: {BENCH_CROP_GLOB}")
+        return
+    labels = load_labels(sys.argv[1] if len(sys.argv) > 1 else None)
+    rules = BibRules()
+    reader = create_reader(['en'])
+
+    def choose(ocr_results):
+        best = (None, 0, None)
+        for _, text, conf in ocr_results:
+            if conf > BENCH_CONFIDENCE and conf > best[1]:
+                bib, _, _ = rules.resolve(text)
+                if bib:
+                    best = (bib, conf, None)
+        return best
+
+    paths = {
+        "readtext": OcrCascade(reader, choose, variants=[]),
+        "recognize": OcrCascade(reader, choose, variants=[], fast=None, recognize=RECOGNIZE_VARIANT),
+        "recognize+fallback": OcrCascade(reader, choose, variants=[], recognize=RECOGNIZE_VARIANT),
+    }
+
+    print(f"🚀 Benchmarking {len(crops)} crops ({len(labels)} labelled)")
+    results = {}
+    for name, cascade in paths.items():
+        cascade.read_many([crop for _, crop in crops[:2]])  # warm-up
+        cascade.stats = {stage: VariantStats() for stage in cascade.stats}
+        times, bibs = [], []
+        for _, crop in crops:
+            start = time.perf_counter()
+            bib, _, _, _ = cascade.read_many([crop])[0]
+            times.append(time.perf_counter() - start)
+            bibs.append(bib)
+        results[name] = bibs
+        times = np.array(times) * 1000
+        line = (f"📊 {name:<19} {times.mean():6.1f} ms/crop (p95 {np.percentile(times, 95):6.1f}), "
+                f"read {sum(b is not None for b in bibs) / len(bibs):6.1%}")
+        if name != "readtext":
+            same = sum(a == b for a, b in zip(bibs, results["readtext"])) / len(bibs)
+            line += f", same as readtext {same:6.1%}"
+        scored = []
+        if labels:
+            scored = [(bib, labels[file]) for (file, _), bib in zip(crops, bibs) if file in labels]
+        if scored:
+            line += f", correct {sum(bib == truth for bib, truth in scored) / len(scored):6.1%}"
+        print(line)
+    stats = paths["recognize+fallback"].stats
+    print(f"   fallback to readtext on {stats['fast'].attempts}/{stats['recognize'].attempts} crops")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import cv2
+import numpy as np
+import easyocr
+import glob
+import os
+import sys
+import time
+import queue
+import multiprocessing
+from collections import deque
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+from ocr_reader import create_reader, ensure_cache, format_stats, CACHE_DIR, QUANTIZE
+from memory_budget import rss_bytes, private_bytes
+
+# 🔧 กำหนดค่าหลัก
+OCR_WORKERS = 4                   # จำนวน process สำหรับ OCR
+TORCH_THREADS_PER_WORKER = 1      # จำนวน thread ของ torch ต่อ process
+SLOTS_PER_WORKER = 2              # จำนวนช่อง shared memory ต่อ worker (ส่งงานล่วงหน้าได้)
+SLOT_BYTES = 640 * 480 * 3        # ขนาดสูงสุดของ crop ที่ส่งผ่าน shared memory
+WARMUP_TIMEOUT_SEC = 120.0        # รอ worker ทุกตัวโหลด reader เสร็จได้นานสุดเท่านี้
+WARMUP_HOLD_SEC = 0.05            # worker ถือคำถาม warmup ไว้สักครู่ ให้คำถามกระจายไปถึงทุกตัว
+BENCH_CROP_GLOB = "predicted/cropped/*.jpg"
+BENCH_WORKER_COUNTS = [1, 2, 4, 8]
+
+# สถานะภายใน worker process
+_reader = None
+_load_stats = None
+_segments = {}
+
+
+def _init_worker(languages, torch_threads, gpu, quantize, cache_dir):
+    """โหลด reader ครั้งเดียวต่อ process และจำกัดจำนวน thread"""
+    global _reader, _load_stats
+    import torch
+    torch.set_num_threads(torch_threads)
+    cv2.setNumThreads(1)
+    if _reader is not None:
+        # fork: ใช้ reader ที่ process หลักโหลดไว้ (หน้า weights แชร์แบบ copy-on-write)
+        _load_stats = {"pid": os.getpid(), "source": "fork", "seconds": 0.0, "rss_before": rss_bytes(),
+                       "rss_after": rss_bytes(), "private": private_bytes()}
+        return
+    _load_stats = {}
+    _reader = create_reader(languages, gpu=gpu, quantize=quantize, cache_dir=cache_dir, stats=_load_stats)
+
+
+def _attach(name):
+    """เปิด shared memory ตามชื่อ (cache ไว้ต่อ process)"""
+    segment = _segments.get(name)
+    if segment is None:
+        if sys.version_info >= (3, 13):
+            # process หลักเป็นเจ้าของ segment - worker แค่เปิดใช้ ไม่ลงทะเบียนกับ resource tracker
+            segment = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # ก่อน 3.13 การเปิดจะลงทะเบียนกับ resource tracker ซึ่งเป็นตัวเดียวกับของ process หลัก (spawn/fork ใช้ร่วมกัน)
+            # การลงทะเบียนซ้ำไม่มีผล แต่ห้าม unregister ที่นี่ - จะลบการลงทะเบียนของ process หลักไปด้วย
+            segment = shared_memory.SharedMemory(name=name)
+        _segments[name] = segment
+    return segment
+
+
+def _to_plain(results):
+    """แปลงผล readtext ให้เป็นชนิดพื้นฐาน เพื่อส่งกลับข้าม process ได้เบาๆ"""
+    return [([[int(x), int(y)] for x, y in bbox], text, float(conf)) for bbox, text, conf in results]
+
+
+def _ocr_shared(slot_name, shape, dtype, method, kwargs):
+    segment = _attach(slot_name)
+    image = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+    return _to_plain(getattr(_reader, method)(image, **kwargs))
+
+
+def _ocr_pickled(image, method, kwargs):
+    return _to_plain(getattr(_reader, method)(image, **kwargs))
+
+
+def _worker_info(hold=0.0):
+    time.sleep(hold)
+    return _load_stats
+
+
+class OcrPool:
+    """OCR หลาย process ใช้แทน easyocr.Reader ได้ (มี readtext / recognize แบบเดียวกัน)
+
+    ภาพ crop ถูกคัดลอกลงช่อง shared memory ที่จองไว้ล่วงหน้า แล้วส่งแค่ชื่อช่อง+shape ให้ worker
+
+    reader ของ worker มาจาก ocr_reader.create_reader (recognizer int8 + cache ใน ``cache_dir``)
+    - ``start_method="spawn"`` worker โหลด cache แบบ mmap เอง (weights ที่ไม่ถูกแก้ใช้หน้า page cache ร่วมกัน)
+    - ``start_method="fork"`` (Linux) process หลักโหลดครั้งเดียว worker ได้ weights ชุดเดียวกันแบบ copy-on-write
+      ต้องสร้าง pool ก่อนเริ่ม thread อื่นๆ (fork ตอนมี thread อื่นถือ lock อยู่อาจค้าง)
+    """
+
+    def __init__(self, workers=OCR_WORKERS, torch_threads=TORCH_THREADS_PER_WORKER,
+                 languages=('en',), gpu=False, slot_bytes=SLOT_BYTES,
+                 quantize=QUANTIZE, cache_dir=CACHE_DIR, start_method="spawn"):
+        global _reader
+        self.workers = workers
+        self.slot_bytes = slot_bytes
+        self._owns_reader = False
+        if cache_dir and not gpu:
+            ensure_cache(list(languages), quantize, cache_dir)
+        if start_method == "fork" and _reader is None:
+            _reader = create_reader(list(languages), gpu=gpu, quantize=quantize, cache_dir=cache_dir)
+            self._owns_reader = True
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(list(languages), torch_threads, gpu, quantize, cache_dir),
+        )
+        self._slots = [shared_memory.SharedMemory(create=True, size=slot_bytes)
+                       for _ in range(workers * SLOTS_PER_WORKER)]
+        self._free = queue.Queue()
+        for slot in self._slots:
+            self._free.put(slot)
+
+    def warmup(self, timeout=WARMUP_TIMEOUT_SEC):
+        """บังคับให้ worker ทุกตัวเริ่มและโหลด reader ก่อนเริ่มงานจริง คืนสถิติการโหลดของแต่ละ worker
+
+        ถามซ้ำจนได้คำตอบครบทุก worker หรือหมดเวลา ``timeout`` (worker ที่เริ่มช้าจะไม่หลุดไปเงียบๆ)
+        """
+        start = time.time()
+        infos = {}
+        while len(infos) < self.workers and time.time() - start < timeout:
+            futures = [self._executor.submit(_worker_info, WARMUP_HOLD_SEC) for _ in range(self.workers)]
+            for future in futures:
+                info = future.result()
+                infos[info["pid"]] = info
+        if len(infos) < self.workers:
+            print(f"⚠️ OCR pool: only {len(infos)}/{self.workers} workers answered within {timeout:.0f}s")
+        else:
+            print(f"✅ OCR pool ready: {len(infos)} workers ({time.time() - start:.1f}s)")
+        for info in infos.values():
+            print(f"   worker {info['pid']}: {format_stats(info)}")
+        return list(infos.values())
+
+    def submit(self, image, method="readtext", **kwargs):
+        """ส่ง crop เข้า OCR แบบไม่รอผล คืนค่า Future (``method`` = readtext หรือ recognize ของ easyocr)"""
+        image = np.ascontiguousarray(image)
+        if image.nbytes > self.slot_bytes:
+            return self._executor.submit(_ocr_pickled, image, method, kwargs)
+
+        slot = self._free.get()  # รอถ้าช่องเต็ม (back-pressure)
+        try:
+            view = np.ndarray(image.shape, dtype=image.dtype, buffer=slot.buf)
+            view[...] = image
+            future = self._executor.submit(_ocr_shared, slot.name, image.shape, image.dtype.str, method, kwargs)
+        except Exception:
+            self._free.put(slot)
+            raise
+        future.add_done_callback(lambda _: self._free.put(slot))
+        return future
+
+    def readtext(self, image, **kwargs):
+        return self.submit(image, **kwargs).result()
+
+    def recognize(self, image, **kwargs):
+        return self.submit(image, method="recognize", **kwargs).result()
+
+    def ocr_many(self, images, method="readtext", **kwargs):
+        """OCR หลายภาพ โดยมีงานค้างใน pool ไม่เกินจำนวน worker"""
+        results = [None] * len(images)
+        in_flight = deque()
+        for i, image in enumerate(images):
+            if len(in_flight) >= max(1, self.workers):
+                j, future = in_flight.popleft()
+                results[j] = future.result()
+            in_flight.append((i, self.submit(image, method=method, **kwargs)))
+        for j, future in in_flight:
+            results[j] = future.result()
+        return results
+
+    def readtext_many(self, images, **kwargs):
+        return self.ocr_many(images, **kwargs)
+
+    def close(self):
+        global _reader
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._owns_reader:
+            _reader = None
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
+        self._slots = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def ocr_many(reader, images, method="readtext", **kwargs):
+    """OCR หลายภาพ - ใช้ pool แบบขนานถ้ามี ไม่งั้นทำทีละภาพกับ reader ปกติ"""
+    if hasattr(reader, "ocr_many"):
+        return reader.ocr_many(images, method=method, **kwargs)
+    call = getattr(reader, method)
+    return [call(image, **kwargs) for image in images]
+
+
+def readtext_many(reader, images, **kwargs):
+    return ocr_many(reader, images, **kwargs)
+
+
+def load_bench_crops(with_names=False):
+    """crop ขาวดำสำหรับ benchmark - ``with_names`` คืน ``(ชื่อไฟล์, crop)`` ไว้เทียบกับ labels"""
+    crops = []
+    for path in sorted(glob.glob(BENCH_CROP_GLOB)):
+        crop = cv2.imread(path)
+        if crop is not None:
+            gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+            crops.append((os.path.basename(path), gray) if with_names else gray)
+    return crops
+
+
+def main():
+    """วัด throughput (crops/sec) เทียบกับจำนวน worker"""
+    crops = load_bench_crops()
+    if not crops:
+        print(f"❌ No crops found: {BENCH_CROP_GLOB}")
+        return
+    print(f"🚀 Benchmarking OCR on {len(crops)} crops")
+
+    import torch
+    torch.set_num_threads(TORCH_THREADS_PER_WORKER)
+    reader = easyocr.Reader(['en'], gpu=False, verbose=False)
+    start = time.perf_counter()
+    for crop in crops:
+        reader.readtext(crop, paragraph=False)
+    baseline = len(crops) / (time.perf_counter() - start)
+    print(f"📊 in-process reader: {baseline:.1f} crops/sec")
+    del reader
+
+    for workers in BENCH_WORKER_COUNTS:
+        with OcrPool(workers=workers) as pool:
+            pool.warmup()
+            start = time.perf_counter()
+            pool.readtext_many(crops, paragraph=False)
+            rate = len(crops) / (time.perf_counter() - start)
+        print(f"📊 {workers} workers: {rate:.1f} crops/sec ({rate / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import multiprocessing
+
+import easyocr
+import torch
+
+from memory_budget import rss_bytes, private_bytes, format_mb
+
+# 🔧 กำหนดค่าหลัก
+CACHE_DIR = "ocr_cache"       # reader ที่เตรียมแล้ว (quantize แล้ว) เก็บเป็นไฟล์ torch.save
+QUANTIZE = True               # recognizer (LSTM + Linear) เป็น int8 แบบ dynamic บน CPU
+BENCH_WORKERS = 4
+
+
+def cache_path(languages, quantize=QUANTIZE, cache_dir=CACHE_DIR):
+    """ไฟล์ cache ผูกกับภาษาและเวอร์ชัน easyocr/torch - อัปเดต library แล้วสร้างใหม่เอง"""
+    tag = "int8" if quantize else "fp32"
+    name = f"easyocr-{easyocr.__version__}_torch-{torch.__version__}_{'-'.join(languages)}_{tag}.pt"
+    return os.path.join(cache_dir, name.replace("+", "_"))
+
+
+def build_reader(languages, quantize=QUANTIZE):
+    """สร้าง reader จากไฟล์ weights ของ easyocr (ช้า: โหลด fp32 แล้ว quantize ทุกครั้ง)"""
+    reader = easyocr.Reader(list(languages), gpu=False, quantize=quantize, verbose=False)
+    if quantize:
+        # easyocr quantize ให้เองเมื่อ quantize=True แต่ระบุชั้นชัดๆ ไว้ (ชั้นที่เป็น int8 แล้วจะถูกข้าม)
+        torch.quantization.quantize_dynamic(reader.recognizer, {torch.nn.LSTM, torch.nn.Linear},
+                                            dtype=torch.qint8, inplace=True)
+    return reader
+
+
+def save_cache(reader, path):
+    """เก็บ reader ทั้งตัว (โมเดล + converter) - เขียนไฟล์ชั่วคราวก่อน กัน worker อื่นอ่านไฟล์ครึ่งๆ"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        torch.save(reader, tmp_path)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"⚠️ Cannot cache OCR reader ({e}), loading from easyocr weights each time")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def load_cache(path):
+    """โหลด reader จาก cache แบบ mmap - tensor ที่ไม่ถูกแก้ (weights fp32 ของ detector) เป็นหน้า page cache
+    หน้าเดียวกันในทุก process ที่เปิดไฟล์นี้ แทนที่จะเป็นสำเนาของใครของมัน
+    """
+    try:
+        return torch.load(path, map_location="cpu", weights_only=False, mmap=True)
+    except TypeError:
+        # torch < 2.1 ไม่มี mmap
+        return torch.load(path, map_location="cpu")
+
+
+def ensure_cache(languages, quantize=QUANTIZE, cache_dir=CACHE_DIR):
+    """สร้างไฟล์ cache ถ้ายังไม่มี (เรียกใน process หลักก่อนเปิด worker จะได้ไม่สร้างซ้ำพร้อมกัน)"""
+    path = cache_path(languages, quantize, cache_dir)
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        if save_cache(build_reader(languages, quantize), path):
+            print(f"✅ OCR reader cached: {path} ({time.perf_counter() - start:.1f}s)")
+    return path
+
+
+def create_reader(languages=('en',), gpu=False, quantize=QUANTIZE, cache_dir=CACHE_DIR, stats=None):
+    """easyocr.Reader ที่โหลดเร็วและแชร์ weights ได้ ใช้แทน ``easyocr.Reader(languages)``
+
+    - GPU: easyocr.Reader ปกติ (ไม่ quantize ไม่ cache)
+    - CPU: โหลดจาก ``cache_dir`` ถ้ามี ไม่งั้นสร้าง (recognizer int8 ถ้า ``quantize``) แล้วเก็บ cache ไว้
+    - ``cache_dir=None`` = สร้างใหม่ทุกครั้ง (แบบเดิม)
+
+    ``stats`` (dict) ถ้าส่งมาจะได้ ``source`` (gpu/cache/build), เวลาโหลด, RSS ก่อน/หลัง และหน่วยความจำ private
+    """
+    start = time.perf_counter()
+    rss_before = rss_bytes()
+    reader = None
+    if gpu:
+        reader = easyocr.Reader(list(languages), gpu=True, verbose=False)
+        source = "gpu"
+    elif cache_dir:
+        path = cache_path(languages, quantize, cache_dir)
+        if os.path.exists(path):
+            try:
+                reader = load_cache(path)
+                source = "cache"
+            except Exception as e:
+                print(f"⚠️ Cannot load OCR cache {path}: {e}")
+        if reader is None:
+            reader = build_reader(languages, quantize)
+            source = "build"
+            save_cache(reader, path)
+    else:
+        reader = build_reader(languages, quantize)
+        source = "build"
+
+    if stats is not None:
+        stats.update(pid=os.getpid(), source=source, seconds=time.perf_counter() - start,
+                     rss_before=rss_before, rss_after=rss_bytes(), private=private_bytes())
+    return reader
+
+
+def format_stats(stats):
+    return (f"{stats['source']:<5} load {stats['seconds']:.2f}s | RSS {format_mb(stats['rss_before'])} -> "
+            f"{format_mb(stats['rss_after'])} | private {format_mb(stats['private'])}")
+
+
+def main():
+    """เทียบการโหลด reader ใน OcrPool: แบบเดิม / int8 + cache (mmap) / int8 + cache (fork)
+
+    python ocr_reader.py [จำนวน worker]
+    """
+    from ocr_pool import OcrPool, load_bench_crops, BENCH_CROP_GLOB
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else BENCH_WORKERS
+    crops = load_bench_crops()
+    if not crops:
+        print(f"⚠️ No crops found ({BENCH_CROP_GLOB}) - measuring load only")
+
+    setups = [
+        ("fp32, no cache", dict(quantize=False, cache_dir=None, start_method="spawn")),
+        ("int8, no cache (before)", dict(quantize=True, cache_dir=None, start_method="spawn")),
+        ("int8 + cache, spawn/mmap", dict(quantize=True, cache_dir=CACHE_DIR, start_method="spawn")),
+    ]
+    if "fork" in multiprocessing.get_all_start_methods():
+        setups.append(("int8 + cache, fork", dict(quantize=True, cache_dir=CACHE_DIR, start_method="fork")))
+
+    reference = None
+    for name, options in setups:
+        print(f"\n🚀 {name} ({workers} workers)")
+        with OcrPool(workers=workers, **options) as pool:
+            infos = pool.warmup()
+            if crops:
+                start = time.perf_counter()
+                texts = [" ".join(t for _, t, _ in r) for r in pool.readtext_many(crops, paragraph=False)]
+                rate = len(crops) / (time.perf_counter() - start)
+                reference = reference or texts
+                same = sum(a == b for a, b in zip(texts, reference)) / len(crops)
+                print(f"📊 {rate:.1f} crops/sec, same text as fp32 on {same:.1%} of crops")
+        if infos:
+            print(f"📊 total: load {max(i['seconds'] for i in infos):.2f}s (slowest worker), "
+                  f"private {format_mb(sum(i['private'] or 0 for i in infos))}")
+
+
+if __name__ == '__main__':
+    main()
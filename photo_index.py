@@ -0,0 +1,228 @@
+import os
+import sys
+import time
+import numpy as np
+
+from start_list import edit_distance, deletion_variants
+
+# 🔧 กำหนดค่าหลัก
+INDEX_DIR = "photo_index"
+FUZZY_CONF = 0.6          # posting ที่ความมั่นใจต่ำกว่านี้ จะถูกค้นแบบใกล้เคียงได้
+FUZZY_MAX_DISTANCE = 1    # edit distance สูงสุดของการค้นแบบใกล้เคียง
+
+# หนึ่ง posting = bib หนึ่งตัวในภาพหนึ่งภาพ (20 bytes)
+POSTING_DTYPE = np.dtype([
+    ("bib", "<u4"),
+    ("photo", "<u4"),
+    ("x1", "<u2"), ("y1", "<u2"), ("x2", "<u2"), ("y2", "<u2"),
+    ("conf", "<f4"),
+])
+MAX_POSTING_BIB = int(np.iinfo(np.uint32).max)   # bib ที่ใหญ่กว่านี้เก็บใน posting ไม่ได้ (OCR อ่านเลขติดกัน)
+
+
+class PhotoIndex:
+    """inverted index จากเลข bib ไปยังภาพ เก็บบนดิสก์และเปิดด้วย memory map
+
+    - ``postings.bin`` posting ที่ compact แล้ว เรียงตาม (bib, photo) ค้นด้วย binary search
+    - ``delta.bin`` posting ใหม่ที่ต่อท้ายระหว่างรัน batch (โหลดเข้าหน่วยความจำตอนเปิด)
+    - ``photos.txt`` path ของภาพ บรรทัดที่ i คือ photo id i
+    - ``fuzzy_keys.npy`` bib ที่มี posting ความมั่นใจต่ำ ใช้สร้างดัชนีค้นแบบใกล้เคียง
+    """
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        os.makedirs(index_dir, exist_ok=True)
+        self._postings_path = os.path.join(index_dir, "postings.bin")
+        self._delta_path = os.path.join(index_dir, "delta.bin")
+        self._photos_path = os.path.join(index_dir, "photos.txt")
+        self._fuzzy_path = os.path.join(index_dir, "fuzzy_keys.npy")
+
+        self._photos = []
+        self._photo_ids = {}
+        if os.path.exists(self._photos_path):
+            with open(self._photos_path, encoding="utf-8") as f:
+                for line in f:
+                    self._register(line.rstrip("\n"))
+        self._photos_file = open(self._photos_path, "a", encoding="utf-8")
+
+        self._postings = self._map_postings()
+        self._delta = []
+        if os.path.exists(self._delta_path):
+            self._delta = list(np.fromfile(self._delta_path, dtype=POSTING_DTYPE))
+        self._delta_file = open(self._delta_path, "ab")
+
+        self._fuzzy_index = None
+        self._keys = None  # (photo, bib, กล่อง) ที่มีแล้ว - สร้างตอน add ครั้งแรก กันรันซ้ำแล้ว posting ซ้ำ
+
+    def _register(self, path):
+        self._photo_ids[path] = len(self._photos)
+        self._photos.append(path)
+        return self._photo_ids[path]
+
+    def _map_postings(self):
+        if not os.path.exists(self._postings_path) or os.path.getsize(self._postings_path) == 0:
+            return np.zeros(0, dtype=POSTING_DTYPE)
+        return np.memmap(self._postings_path, dtype=POSTING_DTYPE, mode="r")
+
+    def __len__(self):
+        return len(self._postings) + len(self._delta)
+
+    # ---------- การเขียน ----------
+
+    def _existing_keys(self):
+        if self._keys is None:
+            rows = np.concatenate([np.asarray(self._postings), np.array(self._delta, dtype=POSTING_DTYPE)])
+            columns = [rows[name].tolist() for name in ("photo", "bib", "x1", "y1", "x2", "y2")]
+            self._keys = set(zip(*columns))
+        return self._keys
+
+    def add(self, photo_path, bib, box, conf):
+        """เพิ่ม posting หนึ่งรายการ (เรียกจาก batch pipeline ระหว่างประมวลผล)
+
+        คืน False ถ้าเลขใช้ไม่ได้ (ไม่ใช่ตัวเลข/ใหญ่เกิน) หรือมี posting เดียวกันแล้ว (รัน batch ซ้ำโฟลเดอร์เดิม)
+        """
+        bib = str(bib).strip().lstrip('0')
+        if not bib.isdigit() or int(bib) > MAX_POSTING_BIB:
+            return False
+
+        x1, y1, x2, y2 = (max(0, min(65535, int(v))) for v in box)
+        photo_id = self._photo_ids.get(photo_path)
+        if photo_id is not None and (photo_id, int(bib), x1, y1, x2, y2) in self._existing_keys():
+            return False
+
+        if photo_id is None:
+            photo_id = self._register(photo_path)
+            # path ต้องถึงดิสก์ก่อน posting ที่อ้างถึง - ไม่งั้นถ้าโปรแกรมหยุดกลางทางจะมี photo id ที่ไม่มีชื่อไฟล์
+            self._photos_file.write(photo_path + "\n")
+            self._photos_file.flush()
+            os.fsync(self._photos_file.fileno())
+
+        record = np.array([(int(bib), photo_id, x1, y1, x2, y2, float(conf))], dtype=POSTING_DTYPE)
+        record.tofile(self._delta_file)
+        self._delta.append(record[0])
+        self._existing_keys().add((photo_id, int(bib), x1, y1, x2, y2))
+        self._fuzzy_index = None
+        return True
+
+    def flush(self):
+        self._photos_file.flush()
+        os.fsync(self._photos_file.fileno())
+        self._delta_file.flush()
+
+    def compact(self):
+        """รวม delta เข้ากับ postings หลักแล้วเรียงใหม่ (เรียกตอนจบ batch)"""
+        self.flush()
+        if not self._delta:
+            return
+
+        merged = np.concatenate([np.asarray(self._postings), np.array(self._delta, dtype=POSTING_DTYPE)])
+        merged = merged[np.lexsort((merged["photo"], merged["bib"]))]
+
+        fuzzy_keys = np.unique(merged["bib"][merged["conf"] < FUZZY_CONF])
+
+        # ต้องปล่อย memmap เดิมก่อนเขียนทับ (Windows ไม่ยอมให้แทนที่ไฟล์ที่ map อยู่)
+        self._postings = None
+        tmp_path = self._postings_path + ".tmp"
+        merged.tofile(tmp_path)
+        os.replace(tmp_path, self._postings_path)
+        np.save(self._fuzzy_path, fuzzy_keys)
+
+        self._delta_file.close()
+        self._delta_file = open(self._delta_path, "wb")
+        self._delta = []
+        self._postings = self._map_postings()
+        self._fuzzy_index = None
+        print(f"✅ Photo index compacted: {len(self._postings)} postings, {len(self._photos)} photos")
+
+    def close(self):
+        self._photos_file.close()
+        self._delta_file.close()
+
+    # ---------- การค้นหา ----------
+
+    def _exact(self, bib):
+        """posting ทั้งหมดของ bib (binary search บน memmap + สแกน delta)"""
+        column = self._postings["bib"]
+        start = np.searchsorted(column, bib, side="left")
+        end = np.searchsorted(column, bib, side="right")
+        rows = [self._postings[i] for i in range(start, end)]
+        rows.extend(r for r in self._delta if r["bib"] == bib)
+        return rows
+
+    def _build_fuzzy_index(self):
+        """ดัชนี deletion variant -> bib ของ posting ความมั่นใจต่ำ (สร้างครั้งแรกที่ใช้)"""
+        keys = set()
+        if os.path.exists(self._fuzzy_path):
+            keys.update(int(k) for k in np.load(self._fuzzy_path))
+        keys.update(int(r["bib"]) for r in self._delta if r["conf"] < FUZZY_CONF)
+
+        index = {}
+        for key in keys:
+            for variant in deletion_variants(str(key), FUZZY_MAX_DISTANCE):
+                index.setdefault(variant, set()).add(key)
+        self._fuzzy_index = index
+
+    def lookup(self, bib, fuzzy=True):
+        """ภาพทั้งหมดของ bib - ถ้า fuzzy รวมภาพที่อ่านเลขใกล้เคียงแต่ความมั่นใจต่ำด้วย"""
+        text = str(bib).strip().lstrip('0')
+        if not text.isdigit():
+            return []
+
+        if int(text) > MAX_POSTING_BIB:
+            return []
+
+        results = []
+        for r in self._exact(int(text)):
+            results.append(self._to_result(r, exact=True))
+
+        if fuzzy:
+            if self._fuzzy_index is None:
+                self._build_fuzzy_index()
+            candidates = set()
+            for variant in deletion_variants(text, FUZZY_MAX_DISTANCE):
+                candidates |= self._fuzzy_index.get(variant, set())
+            candidates.discard(int(text))
+            for candidate in sorted(candidates):
+                if edit_distance(text, str(candidate)) > FUZZY_MAX_DISTANCE:
+                    continue
+                for r in self._exact(candidate):
+                    if r["conf"] < FUZZY_CONF:
+                        results.append(self._to_result(r, exact=False))
+
+        # ข้าม posting ที่ photo id ไม่มีใน photos.txt (index จากเวอร์ชันเก่าที่หยุดกลางทาง)
+        return [r for r in results if r is not None]
+
+    def _to_result(self, r, exact):
+        if int(r["photo"]) >= len(self._photos):
+            return None
+        return {
+            "photo": self._photos[int(r["photo"])],
+            "bib": str(int(r["bib"])),
+            "box": [int(r["x1"]), int(r["y1"]), int(r["x2"]), int(r["y2"])],
+            "conf": round(float(r["conf"]), 3),
+            "exact": exact,
+        }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python photo_index.py <bib> [<bib> ...]")
+        return
+
+    start = time.perf_counter()
+    index = PhotoIndex()
+    print(f"✅ Index opened in {(time.perf_counter() - start) * 1000:.1f} ms ({len(index)} postings)")
+
+    for bib in sys.argv[1:]:
+        start = time.perf_counter()
+        results = index.lookup(bib)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        print(f"🔍 Bib {bib}: {len(results)} photos ({elapsed_us:.0f} µs)")
+        for r in results:
+            marker = "" if r["exact"] else f" ~ read as {r['bib']}"
+            print(f"   - {r['photo']} {r['box']} conf={r['conf']}{marker}")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
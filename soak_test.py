@@ -0,0 +1,8 @@
+# soak test หน่วยความจำ: python soak_test.py <video> [--hours H] [--max-growth-mb MB]
+# เทียบเท่า: python -m bib soak  (ตัวเลือกของ soak ส่งต่อได้ตรงๆ)
+import sys
+
+from bib.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main(["soak", *sys.argv[1:]]))
@@ -0,0 +1,142 @@
+import csv
+from array import array
+from bisect import bisect_left
+
+# 🔧 กำหนดค่าหลัก
+MAX_BIB = 999999          # bib ยาวสุด 6 หลัก
+MAX_EDIT_DISTANCE = 1     # ระยะ edit distance สูงสุดที่ยอมแก้ให้
+
+
+def edit_distance(a, b):
+    """Levenshtein distance แบบสองแถว"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def deletion_variants(text, max_distance):
+    """สร้างทุกสตริงที่ได้จากการลบตัวอักษรไม่เกิน max_distance ตัว (symmetric delete)"""
+    variants = {text}
+    frontier = {text}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for word in frontier:
+            for i in range(len(word)):
+                next_frontier.add(word[:i] + word[i + 1:])
+        variants |= next_frontier
+        frontier = next_frontier
+    return variants
+
+
+class StartList:
+    """รายชื่อ bib ที่ลงทะเบียน เก็บแบบกระชับเพื่อให้ตรวจได้ใน O(1)
+
+    - ``_classes`` เป็น bytearray ขนาด MAX_BIB+1 เก็บรหัสระยะ (0 = ไม่ได้ลงทะเบียน)
+    - ``_sorted`` เป็น array ของ bib เรียงลำดับ ใช้ไล่ดูหรือหาช่วง
+    - ``_index`` เป็นดัชนี deletion variant -> bib สำหรับแก้เลขที่อ่านผิดเล็กน้อย
+    """
+
+    def __init__(self, bibs, max_distance=MAX_EDIT_DISTANCE):
+        self.max_distance = max_distance
+        self._classes = bytearray(MAX_BIB + 1)
+        self._class_names = [None]
+        class_ids = {}
+
+        for bib, distance_class in bibs:
+            if distance_class not in class_ids:
+                if len(self._class_names) >= 256:
+                    raise ValueError("Too many distance classes in start list")
+                class_ids[distance_class] = len(self._class_names)
+                self._class_names.append(distance_class)
+            self._classes[bib] = class_ids[distance_class]
+
+        self._sorted = array('I', (i for i, c in enumerate(self._classes) if c))
+
+        self._index = {}
+        for bib in self._sorted:
+            for variant in deletion_variants(str(bib), max_distance):
+                self._index.setdefault(variant, []).append(bib)
+
+    @classmethod
+    def from_csv(cls, path, max_distance=MAX_EDIT_DISTANCE):
+        """โหลดจาก CSV - ใช้คอลัมน์ ``bib`` และ ``distance`` ถ้ามี header ไม่งั้นใช้คอลัมน์แรก/ที่สอง"""
+        bibs = []
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            # ข้ามบรรทัดว่าง (รวมถึงก่อน header) - ไฟล์จาก Excel มักมีบรรทัดว่างปน
+            rows = [row for row in csv.reader(f) if any(cell.strip() for cell in row)]
+
+        bib_col, class_col = 0, 1
+        if rows and not rows[0][0].strip().isdigit():
+            header = [h.strip().lower() for h in rows[0]]
+            bib_col = header.index("bib") if "bib" in header else 0
+            class_col = header.index("distance") if "distance" in header else None
+            rows = rows[1:]
+
+        for row in rows:
+            if not row or bib_col >= len(row):
+                continue
+            text = row[bib_col].strip().lstrip('0')
+            if not text.isdigit() or int(text) > MAX_BIB:
+                continue
+            distance_class = row[class_col].strip() if class_col is not None and class_col < len(row) else ""
+            bibs.append((int(text), distance_class))
+
+        start_list = cls(bibs, max_distance)
+        print(f"✅ Start list loaded: {len(start_list)} bibs from {path}")
+        return start_list
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def __contains__(self, bib):
+        bib = int(bib)
+        return 0 <= bib <= MAX_BIB and self._classes[bib] != 0
+
+    def distance_class(self, bib):
+        """ระยะที่ลงทะเบียน (เช่น 5K/10K/21K) หรือ None ถ้าไม่มีในรายชื่อ - ``""`` ถ้าไฟล์ไม่มีคอลัมน์ระยะ"""
+        bib = int(bib)
+        if not 0 <= bib <= MAX_BIB:
+            return None
+        return self._class_names[self._classes[bib]]
+
+    def in_range(self, low, high):
+        """bib ที่ลงทะเบียนในช่วง [low, high]"""
+        start = bisect_left(self._sorted, low)
+        end = bisect_left(self._sorted, high + 1)
+        return self._sorted[start:end].tolist()
+
+    def correct(self, text):
+        """แก้เลขที่ OCR อ่านได้ให้เป็น bib ที่ลงทะเบียนที่ใกล้ที่สุด
+
+        คืนค่า ``(bib, distance)`` - distance 0 คือตรงพอดี
+        คืน ``(None, None)`` ถ้าไม่มีตัวที่ใกล้พอ หรือมีหลายตัวที่ใกล้เท่ากัน (กำกวม)
+        """
+        text = text.strip().lstrip('0')
+        if not text.isdigit():
+            return None, None
+        if len(text) <= 6 and int(text) in self:
+            return int(text), 0
+
+        best = {}
+        for variant in deletion_variants(text, self.max_distance):
+            for candidate in self._index.get(variant, ()):
+                if candidate not in best:
+                    best[candidate] = edit_distance(text, str(candidate))
+
+        if not best:
+            return None, None
+        min_distance = min(best.values())
+        if min_distance > self.max_distance:
+            return None, None
+        closest = [bib for bib, d in best.items() if d == min_distance]
+        if len(closest) != 1:
+            return None, None
+        return closest[0], min_distance
@@ -1,114 +1,8 @@
-import cv2
-from ultralytics import YOLO
-import easyocr
-from datetime import datetime
-import os
-import time
-import re
-from collections import defaultdict
+# ตรวจจับจากกล้อง บันทึกลงเครื่อง (bib_logs_<checkpoint>/ + bib_records_<checkpoint>.csv)
+# เทียบเท่า: python -m bib --set output.sink=local detect-camera  (ส่ง --config / --set ต่อได้)
+import sys
 
-# ตั้งค่า
-OUTPUT_DIR = "bib_logs2"
-LOG_FILE = "bib_records2.csv"
-CONF_THRESHOLD = 0.5
-DUPLICATE_TIME_SEC = 10
-VOTING_WINDOW_SEC = 3
-VOTING_THRESHOLD = 2
+from bib.cli import main
 
-BLACKLIST = ['m40', 'f30', 'fun', 'run', 'sponsor', 'nike', 'qr', 'km']
-VALID_BIB_PATTERNS = [
-    r'^5\d{3}$',
-    r'^10\d{3}$',
-    r'^21\d{3}$',
-    r'^\d{4}$'
-]
-
-def is_valid_bib(bib):
-    for pattern in VALID_BIB_PATTERNS:
-        if re.match(pattern, bib):
-            return True
-    return False
-
-def normalize_bib(text):
-    text = text.strip().lstrip('0')
-    return text if text.isdigit() else None
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-model = YOLO('runs/detect/bib_aug_yolo_default/weights/best.pt')
-reader = easyocr.Reader(['en'])
-
-last_detected = {}
-detection_votes = defaultdict(list)  # bib_number: list[timestamp]
-
-cap = cv2.VideoCapture(0)
-
-if not cap.isOpened():
-    print("Error: Cannot open camera")
-    exit()
-
-print("Start capturing video...")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("Error: Cannot read frame")
-        break
-
-    results = model(frame)
-
-    for result in results:
-        for box in result.boxes:
-            conf = box.conf.item()
-            if conf < 0.3:
-                continue
-
-            x1, y1, x2, y2 = box.xyxy[0].int().tolist()
-            cropped_bib = frame[y1:y2, x1:x2]
-
-            ocr_result = reader.readtext(cropped_bib)
-            texts = []
-            for bbox, text, ocr_conf in ocr_result:
-                if ocr_conf > CONF_THRESHOLD:
-                    clean = text.strip()
-                    if all(bad not in clean.lower() for bad in BLACKLIST):
-                        digits = re.sub(r'\D', '', clean)
-                        if digits:
-                            texts.append(digits)
-
-            combined = ''.join(texts)
-            if not combined:
-                continue
-
-            normalized = combined.lstrip('0') or '0'
-            current_time = time.time()
-
-            if is_valid_bib(normalized):
-                # เพิ่ม timestamp ใน vote list
-                detection_votes[normalized].append(current_time)
-                detection_votes[normalized] = [t for t in detection_votes[normalized] if current_time - t <= VOTING_WINDOW_SEC]
-
-                if len(detection_votes[normalized]) >= VOTING_THRESHOLD:
-                    last_time = last_detected.get(normalized, 0)
-                    if current_time - last_time > DUPLICATE_TIME_SEC:
-                        last_detected[normalized] = current_time
-
-                        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        filename = f"{normalized}_{timestamp_str}.jpg"
-                        cv2.imwrite(os.path.join(OUTPUT_DIR, filename), frame)
-
-                        with open(LOG_FILE, "a") as f:
-                            f.write(f"{timestamp_str},{normalized},{filename}\n")
-
-                        print(f"Detected bib: {normalized}, saved image and log.")
-
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 2)
-                    cv2.putText(frame, normalized, (x1, y1-10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
-
-    cv2.imshow("Bib Detection Realtime", frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
+if __name__ == '__main__':
+    sys.exit(main(["--set", "output.sink=local", *sys.argv[1:], "detect-camera"]))
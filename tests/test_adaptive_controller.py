@@ -0,0 +1,30 @@
+from adaptive_controller import AdaptiveController
+
+
+def make_controller(**kwargs):
+    return AdaptiveController(initial_stride=5, initial_imgsz=640, target_latency=0.35, log_file=None, **kwargs)
+
+
+def test_surge_of_crops_drops_stride_to_minimum_immediately():
+    controller = make_controller()
+    controller.observe(0.2, 0, 0)
+    assert controller.stride == 5
+
+    assert controller.observe(0.2, 0, 4)
+    assert controller.stride == 1
+
+
+def test_queue_jump_counts_as_surge():
+    controller = make_controller()
+    controller.observe(0.2, 0, 0)
+
+    assert controller.observe(0.2, 10, 0)
+    assert controller.stride == 1
+
+
+def test_steady_crops_do_not_trigger_surge():
+    controller = make_controller()
+    for _ in range(20):
+        controller.observe(0.2, 0, 1)
+    assert not controller.observe(0.2, 0, 1)
+    assert controller.stride == 5
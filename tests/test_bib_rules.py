@@ -0,0 +1,21 @@
+from bib_rules import BibRules
+from start_list import StartList
+
+
+def test_resolve_reasons():
+    rules = BibRules(patterns=[r"^\d{4}$"])
+
+    assert rules.resolve("") == (None, False, "no_text")
+    assert rules.resolve("NIKE 2024") == (None, False, "blacklist")
+    assert rules.resolve("ABC") == (None, False, "no_digits")
+    assert rules.resolve("12") == (None, False, "invalid")
+    assert rules.resolve("0I23 4") == ("1234", False, "ok")
+
+
+def test_resolve_corrects_to_start_list():
+    rules = BibRules(start_list=StartList([(11061, "21K"), (1234, ""), (1235, "")]))
+
+    assert rules.resolve("1234") == ("1234", True, "ok")
+    assert rules.resolve("111061") == ("11061", False, "ok")
+    assert rules.resolve("1236") == (None, False, "not_registered")  # ใกล้ 1234 และ 1235 เท่ากัน
+    assert rules.resolve("99999") == (None, False, "not_registered")
@@ -0,0 +1,43 @@
+import numpy as np
+
+from box_plan import build_crop_plan
+
+
+def dets(*rows):
+    return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+
+def test_filters_confidence_and_small_boxes_and_sorts_by_priority():
+    detections = dets(
+        [10, 10, 60, 60, 0.9, 0],     # เล็กกว่า
+        [100, 100, 300, 300, 0.8, 0],  # ใหญ่กว่า -> priority สูงกว่า
+        [0, 0, 50, 50, 0.3, 0],        # ความมั่นใจต่ำ
+        [400, 400, 405, 405, 0.9, 0],  # เล็กเกินไป
+    )
+    plan, duplicates, too_small = build_crop_plan(detections, (480, 640), 0.6, padding=5, min_size=20)
+
+    assert too_small == 1
+    assert len(duplicates) == 0
+    assert [int(row["bx1"]) for row in plan] == [100, 10]
+    assert (int(plan[1]["x1"]), int(plan[1]["y1"])) == (5, 5)
+
+
+def test_padding_is_clamped_to_frame():
+    plan, _, _ = build_crop_plan(dets([0, 0, 100, 100, 0.9, 0]), (80, 90), 0.5, padding=5)
+    assert tuple(int(plan[0][k]) for k in ("x1", "y1", "x2", "y2")) == (0, 0, 90, 80)
+
+
+def test_roi_keeps_boxes_with_centre_inside():
+    detections = dets([0, 0, 40, 40, 0.9, 0], [200, 200, 260, 260, 0.9, 0])
+    plan, _, _ = build_crop_plan(detections, (480, 640), 0.5, roi=(100, 100, 400, 400))
+    assert [int(row["bx1"]) for row in plan] == [200]
+
+
+def test_overlapping_tracked_box_becomes_duplicate():
+    detections = dets([100, 100, 200, 200, 0.9, 0], [300, 300, 400, 400, 0.9, 0])
+    tracked = np.array([[500, 500, 560, 560], [105, 102, 205, 200]], dtype=np.int32)
+    plan, duplicates, _ = build_crop_plan(detections, (480, 640), 0.5, tracked_boxes=tracked, dedup_iou=0.5)
+
+    assert [int(row["bx1"]) for row in plan] == [300]
+    assert len(duplicates) == 1
+    assert int(duplicates[0]["track"]) == 1
@@ -0,0 +1,83 @@
+import json
+
+from checkpoint_aggregator import SplitTable, StreamTailer
+
+CHECKPOINTS = ["cp1", "cp2", "finish"]
+
+
+def event(cp, bib, t):
+    return {"checkpoint": cp, "bib": bib, "time": t}
+
+
+def test_ingest_keeps_first_passing_and_rejects_bad_events():
+    table = SplitTable(CHECKPOINTS)
+
+    assert table.ingest(event("cp1", "101", 100.0))
+    assert not table.ingest(event("cp1", "101", 105.0))  # เห็นซ้ำ - ใช้เวลาแรก
+    assert table.ingest(event("cp1", "101", 99.0))       # เวลาเร็วกว่า แทนของเดิม
+    assert not table.ingest(event("cp9", "101", 1.0))
+    assert not table.ingest(event("cp1", "", 1.0))
+    assert not table.ingest(event(["cp1"], "102", 1.0))
+    assert not table.ingest(event("cp1", "102", [1.0]))
+    assert not table.ingest(event("cp1", "102", None))
+    assert not table.ingest([])
+    assert not table.ingest(None)
+
+    assert table.where("101")["splits"][0]["checkpoint"] == "cp1"
+    assert table.summary()["per_checkpoint"]["cp1"] == 1
+    assert table.summary()["duplicates"] == 1
+
+
+def test_leaderboard_orders_by_furthest_checkpoint_then_time():
+    table = SplitTable(CHECKPOINTS, gun_time=0.0)
+    table.ingest(event("cp1", "1", 10.0))
+    table.ingest(event("cp1", "2", 12.0))
+    table.ingest(event("cp1", "3", 11.0))
+    table.ingest(event("cp2", "2", 20.0))
+    table.ingest(event("cp2", "1", 21.0))
+    table.ingest(event("finish", "1", 30.0))
+
+    assert [row["bib"] for row in table.leaderboard()] == ["1", "2", "3"]
+    assert [row["bib"] for row in table.leaderboard(2, "cp1")] == ["1", "3"]
+    assert table.where("2")["rank"] == 1
+    assert table.where("2")["checkpoint"] == "cp2"
+
+
+def write_lines(path, lines, end="\n"):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + end)
+
+
+def test_bad_lines_in_the_middle_are_skipped_once(tmp_path):
+    table = SplitTable(CHECKPOINTS)
+    tailer = StreamTailer(table, stream_dir=str(tmp_path))
+    path = tmp_path / "cp1.jsonl"
+    write_lines(path, [
+        json.dumps(event("cp1", "1", 10.0)),
+        "not json",
+        "[]",
+        "null",
+        "5",
+        json.dumps(event(["cp1"], "2", 11.0)),
+        json.dumps(event("cp1", "3", [12.0])),
+        json.dumps(event("cp1", "4", 13.0)),
+    ])
+
+    assert tailer.poll() == 2
+    assert tailer.poll() == 0  # ไม่อ่านบรรทัดเสียซ้ำ
+    write_lines(path, [json.dumps(event("cp1", "5", 14.0))])
+    assert tailer.poll() == 1
+    assert [row["bib"] for row in table.leaderboard(checkpoint="cp1")] == ["1", "4", "5"]
+
+
+def test_partial_last_line_is_read_on_next_poll(tmp_path):
+    table = SplitTable(CHECKPOINTS)
+    tailer = StreamTailer(table, stream_dir=str(tmp_path))
+    path = tmp_path / "cp2.jsonl"
+    line = json.dumps(event("cp2", "7", 50.0))
+    write_lines(path, [json.dumps(event("cp2", "6", 40.0)), line[:10]], end="")
+
+    assert tailer.poll() == 1
+    write_lines(path, [line[10:]])
+    assert tailer.poll() == 1
+    assert table.where("7")["checkpoint"] == "cp2"
@@ -0,0 +1,19 @@
+import os
+
+from bib.config import load_config
+
+REPO_CONFIG = os.path.join(os.path.dirname(__file__), os.pardir, "bib.yaml")
+
+
+def test_dedup_defaults_off_for_camera_on_for_folder(tmp_path):
+    path = tmp_path / "empty.yaml"
+    path.write_text("", encoding="utf-8")
+
+    dedup = load_config(str(path))["dedup"]
+
+    assert dedup["camera"] is False
+    assert dedup["folder"] is True
+
+
+def test_repo_config_keeps_camera_dedup_off():
+    assert load_config(REPO_CONFIG)["dedup"]["camera"] is False
@@ -0,0 +1,46 @@
+import pytest
+
+for module in ("cv2", "easyocr", "torch"):
+    pytest.importorskip(module)
+
+from bib.stages import Confirmer  # noqa: E402
+
+
+def test_confirms_after_min_frames_and_only_once():
+    confirmer = Confirmer(min_frames=2, min_frames_registered=1)
+
+    assert not confirmer.vote("101", False, now=1.0)
+    confirmer.end_frame()
+    assert confirmer.vote("101", False, now=2.0)
+    confirmer.end_frame()
+    assert not confirmer.vote("101", False, now=3.0)
+    assert confirmer.is_detected("101")
+
+
+def test_registered_bib_confirms_in_one_frame():
+    confirmer = Confirmer(min_frames=3, min_frames_registered=1)
+    assert confirmer.vote("7", True, now=1.0)
+
+
+def test_unseen_bib_decays_out_of_tracking():
+    confirmer = Confirmer(min_frames=3)
+    confirmer.vote("5", False, now=1.0)
+    confirmer.end_frame()
+    confirmer.end_frame()
+    assert "5" not in confirmer.tracking
+
+
+def test_repeat_after_sec_allows_second_record():
+    confirmer = Confirmer(min_frames=1, repeat_after_sec=10)
+    assert confirmer.vote("9", False, now=100.0)
+    confirmer.end_frame()
+    assert not confirmer.vote("9", False, now=105.0)
+    assert confirmer.vote("9", False, now=111.0)
+
+
+def test_detected_bibs_are_never_evicted():
+    confirmer = Confirmer(min_frames=1, max_tracking=100)
+    for bib in range(6000):
+        assert confirmer.vote(str(bib), False, now=1.0 + bib)
+        confirmer.end_frame()
+    assert not confirmer.vote("0", False, now=10000.0)
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+for module in ("cv2", "firebase_admin"):
+    pytest.importorskip(module)
+
+import firebase_service  # noqa: E402
+from firebase_service import FirebaseService  # noqa: E402
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    """FirebaseService ที่ SDK ถูกแทนด้วยฟังก์ชันจำลอง (ไม่ต่อเน็ต)"""
+    monkeypatch.setattr(firebase_service, "init_firebase", lambda *args: (object(), object()))
+    monkeypatch.setattr(firebase_service, "get_temp_directory", lambda: str(tmp_path))
+    created = []
+
+    def make(**kwargs):
+        svc = FirebaseService("key.json", "bucket", "cp1", **kwargs)
+        assert svc.start()
+        created.append(svc)
+        return svc
+
+    yield make
+    for svc in created:
+        svc.shutdown(grace=0.5)
+
+
+def test_pending_bound_counts_work_not_yet_started(service):
+    svc = service(max_concurrency=1)
+    svc.max_pending = 3
+    release = threading.Event()
+    svc._bib_exists_sync = lambda bib: release.wait(5)
+
+    futures = [svc.submit_bib_exists(bib) for bib in range(3)]
+    assert svc.pending() == 3
+    with pytest.raises(OverflowError):
+        svc.submit_bib_exists(99)
+
+    release.set()
+    assert [f.result(5) for f in futures] == [True, True, True]
+    assert svc.pending() == 0
+
+
+def test_timeout_keeps_slot_until_sdk_thread_finishes(service):
+    svc = service(max_concurrency=1, timeout=0.1)
+    finished = threading.Event()
+    order = []
+
+    def slow(bib):
+        time.sleep(0.4)
+        order.append(("slow", time.perf_counter()))
+        finished.set()
+        return True
+
+    svc._bib_exists_sync = slow
+    first = svc.submit_bib_exists(1)
+    assert first.result(5) is False  # timeout -> ถือว่ายังไม่มี
+    assert svc.timeouts == 1
+
+    svc._bib_exists_sync = lambda bib: order.append(("fast", time.perf_counter())) or True
+    assert svc.submit_bib_exists(2).result(5) is True
+    assert finished.is_set()
+    assert [name for name, _ in order] == ["slow", "fast"]  # call ใหม่รอ thread เดิมจบก่อน
+    assert svc.stuck_calls == 0
+
+
+def test_shutdown_drains_finished_work_and_cancels_the_rest(service):
+    svc = service(max_concurrency=2, timeout=5)
+    svc._bib_exists_sync = lambda bib: True
+    done = svc.submit_bib_exists(1)
+    assert done.result(5) is True
+
+    hang = threading.Event()
+    svc._bib_exists_sync = lambda bib: hang.wait(5)
+    stuck = svc.submit_bib_exists(2)
+    svc.shutdown(grace=0.2)
+    hang.set()
+
+    assert stuck.cancelled()
+    assert svc.completed == 1
+    assert svc.pending() == 0
@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("cv2")
+
+from frame_hash import DuplicateFilter  # noqa: E402
+
+
+def test_reuses_result_within_threshold_until_max_reuse():
+    dedup = DuplicateFilter(threshold=1, max_reuse=2)
+    hit, _, key = dedup.lookup_key(((8, 8), 0b1000))
+    assert not hit
+    dedup.store(key, "result")
+
+    assert dedup.lookup_key(((8, 8), 0b1001)) == (True, "result", ((8, 8), 0b1001))
+    assert dedup.lookup_key(((8, 8), 0b1000))[0]
+    assert not dedup.lookup_key(((8, 8), 0b1000))[0]  # ครบ max_reuse แล้ว
+
+
+def test_misses_on_distance_shape_or_invalidate():
+    dedup = DuplicateFilter(threshold=1)
+    dedup.store(((8, 8), 0b0000), "result")
+
+    assert not dedup.lookup_key(((8, 8), 0b0011))[0]
+    assert not dedup.lookup_key(((4, 8), 0b0000))[0]
+    dedup.invalidate()
+    assert not dedup.lookup_key(((8, 8), 0b0000))[0]
+    assert dedup.saved_fraction() == 0.0
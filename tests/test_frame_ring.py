@@ -0,0 +1,51 @@
+import numpy as np
+
+from frame_ring import FrameRing
+
+
+class FakeCamera:
+    """กล้องจำลอง: เขียนลง buffer ที่ส่งมาถ้าขนาดตรง ไม่งั้นคืน array ใหม่ (แบบ OpenCV)"""
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.value = 0
+
+    def read(self, image=None):
+        self.value += 1
+        if image is not None and image.shape == self.shape:
+            image[...] = self.value
+            return True, image
+        return True, np.full(self.shape, self.value, dtype=np.uint8)
+
+
+def test_read_writes_into_ring_and_ref_expires_when_slot_reused():
+    cap = FakeCamera((4, 4, 3))
+    ring = FrameRing((4, 4, 3), slots=2)
+    try:
+        ok, ref, frame = ring.read(cap)
+        assert ok and int(frame[0, 0, 0]) == 1
+        assert ring.get(ref) is not None
+
+        ring.read(cap)
+        ring.read(cap)  # เขียนทับช่องแรก
+        assert ring.get(ref) is None
+        assert ring.copy(ref) is None
+    finally:
+        ring.close()
+
+
+def test_ref_taken_before_reallocation_does_not_match_new_frame():
+    cap = FakeCamera((4, 4, 3))
+    ring = FrameRing((4, 4, 3), slots=4)
+    try:
+        _, old_ref, _ = ring.read(cap)
+        cap.shape = (8, 8, 3)  # กล้องเปลี่ยนความละเอียด -> จองริงใหม่
+        _, new_ref, frame = ring.read(cap)
+
+        assert ring.reallocations == 1
+        assert frame.shape == (8, 8, 3)
+        assert new_ref.slot == old_ref.slot
+        assert ring.get(old_ref) is None
+        assert ring.get(new_ref) is not None
+    finally:
+        ring.close()
@@ -0,0 +1,60 @@
+import json
+
+from bib.importer import BulkImporter, ImportState, LocalBackend, iter_log_rows
+from bib_rules import BibRules
+
+
+def write_log(tmp_path, lines):
+    image_dir = tmp_path / "bib_logs"
+    image_dir.mkdir(exist_ok=True)
+    for line in lines:
+        (image_dir / line.split(",")[-1]).write_bytes(b"jpeg")
+    log_file = tmp_path / "bib_records.csv"
+    log_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return [(str(log_file), str(image_dir), "cp1")]
+
+
+def run(tmp_path, sources, state_path):
+    backend = LocalBackend(str(tmp_path / "out"))
+    importer = BulkImporter(backend, BibRules(), ImportState(str(state_path)), workers=2, batch_size=2)
+    return backend, importer.run(iter_log_rows(sources))
+
+
+def read_docs(backend):
+    with open(backend.docs_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_imports_valid_rows_once(tmp_path):
+    sources = write_log(tmp_path, [
+        "20240101_070000,1234,a.jpg",
+        "20240101_070001,1234,b.jpg",   # bib ซ้ำ
+        "20240101_070002,NIKE,c.jpg",
+        "not-a-time,55,d.jpg",
+        "20240101_070003,77,e.jpg",
+    ])
+
+    backend, stats = run(tmp_path, sources, tmp_path / "state.jsonl")
+
+    docs = read_docs(backend)
+    assert sorted(doc["bib_number"] for doc in docs) == ["1234", "77"]
+    assert {doc["id"] for doc in docs} == {"import_cp1_1234", "import_cp1_77"}
+    assert docs[0]["cp1time"] == "2024-01-01T07:00:00Z"
+    assert stats.outcomes["imported"] == 2
+    assert stats.outcomes["duplicate"] == 1
+    assert stats.outcomes["rejected_blacklist"] == 1
+    assert stats.outcomes["bad_timestamp"] == 1
+
+
+def test_rerun_resumes_without_duplicates(tmp_path):
+    lines = ["20240101_070000,1234,a.jpg"]
+    sources = write_log(tmp_path, lines)
+    state_path = tmp_path / "state.jsonl"
+    run(tmp_path, sources, state_path)
+
+    sources = write_log(tmp_path, lines + ["20240101_070005,88,f.jpg"])
+    backend, stats = run(tmp_path, sources, state_path)
+
+    assert stats.outcomes["already_imported"] == 1
+    assert stats.outcomes["imported"] == 1
+    assert sorted(doc["bib_number"] for doc in read_docs(backend)) == ["1234", "88"]
@@ -0,0 +1,27 @@
+import memory_budget
+from memory_budget import BoundedCounter, MemoryMonitor
+
+
+def test_bounded_counter_keeps_highest_counts_and_new_key():
+    counter = BoundedCounter(2)
+    counter["a"] += 5
+    counter["b"] += 1
+    counter["c"] += 1
+
+    assert counter["missing"] == 0
+    assert set(counter) == {"a", "c"}
+    assert counter.evictions == 1
+
+
+def test_memory_monitor_does_not_trace_by_default():
+    assert MemoryMonitor(log_file=None).trace is False
+
+
+def test_maybe_report_does_not_sample_between_reports(monkeypatch):
+    calls = []
+    monkeypatch.setattr(memory_budget, "rss_bytes", lambda: calls.append(1) or 100)
+    monitor = MemoryMonitor(interval=3600, log_file=None)
+
+    for _ in range(10):
+        assert not monitor.maybe_report()
+    assert calls == []
@@ -0,0 +1,60 @@
+from photo_index import PhotoIndex
+
+
+def test_add_and_lookup(tmp_path):
+    index = PhotoIndex(str(tmp_path))
+    assert index.add("a.jpg", "01234", (10, 20, 110, 220), 0.9)
+    assert index.add("b.jpg", "1234", (0, 0, 50, 50), 0.8)
+
+    photos = sorted(r["photo"] for r in index.lookup("1234"))
+    assert photos == ["a.jpg", "b.jpg"]
+    assert index.lookup("1234")[0]["exact"]
+    index.close()
+
+
+def test_fuzzy_lookup_only_matches_low_confidence(tmp_path):
+    index = PhotoIndex(str(tmp_path))
+    index.add("low.jpg", "1235", (0, 0, 10, 10), 0.3)
+    index.add("high.jpg", "1236", (0, 0, 10, 10), 0.95)
+
+    results = index.lookup("1234")
+    assert [(r["photo"], r["exact"]) for r in results] == [("low.jpg", False)]
+    assert index.lookup("1234", fuzzy=False) == []
+    index.close()
+
+
+def test_rejects_bibs_that_do_not_fit_a_posting(tmp_path):
+    index = PhotoIndex(str(tmp_path))
+    assert not index.add("b.jpg", "12345678901", (0, 0, 10, 10), 0.9)
+    assert not index.add("b.jpg", "12a4", (0, 0, 10, 10), 0.9)
+    assert len(index) == 0
+    assert index.lookup("12345678901") == []
+    index.close()
+
+
+def test_rerun_on_same_photos_does_not_duplicate_postings(tmp_path):
+    index = PhotoIndex(str(tmp_path))
+    index.add("a.jpg", "1234", (10, 20, 110, 220), 0.9)
+    index.compact()
+    index.close()
+
+    index = PhotoIndex(str(tmp_path))
+    assert not index.add("a.jpg", "1234", (10, 20, 110, 220), 0.9)
+    assert index.add("a.jpg", "5678", (200, 20, 300, 220), 0.9)
+    index.close()
+
+    index = PhotoIndex(str(tmp_path))
+    assert len(index) == 2
+    assert len(index.lookup("1234")) == 1
+    index.close()
+
+
+def test_postings_survive_reopen_without_compact(tmp_path):
+    index = PhotoIndex(str(tmp_path))
+    index.add("a.jpg", "42", (0, 0, 10, 10), 0.9)
+    index.flush()
+    index.close()
+
+    index = PhotoIndex(str(tmp_path))
+    assert [r["photo"] for r in index.lookup("42")] == ["a.jpg"]
+    index.close()
@@ -0,0 +1,40 @@
+from start_list import StartList
+
+
+def test_from_csv_skips_blank_rows_before_header(tmp_path):
+    path = tmp_path / "start_list.csv"
+    path.write_text("\nbib,distance\n\n0042,10K\n,\n7,5K\n", encoding="utf-8")
+
+    start_list = StartList.from_csv(str(path))
+
+    assert len(start_list) == 2
+    assert 42 in start_list
+    assert start_list.distance_class(7) == "5K"
+
+
+def test_from_csv_without_header(tmp_path):
+    path = tmp_path / "start_list.csv"
+    path.write_text("101\n102\n", encoding="utf-8")
+
+    start_list = StartList.from_csv(str(path))
+
+    assert len(start_list) == 2
+    assert start_list.distance_class(101) == ""  # ไม่มีคอลัมน์ระยะ
+    assert start_list.distance_class(103) is None
+
+
+def test_correct_near_miss():
+    start_list = StartList([(11061, "21K"), (5000, "5K")])
+    assert start_list.correct("111061") == (11061, 1)  # อ่านเกินมาหนึ่งหลัก
+    assert start_list.correct("011061") == (11061, 0)  # 0 นำหน้าไม่นับ
+
+
+def test_correct_ambiguous_tie_returns_nothing():
+    start_list = StartList([(1234, ""), (1235, "")])
+    assert start_list.correct("1236") == (None, None)
+
+
+def test_correct_out_of_distance_returns_nothing():
+    start_list = StartList([(11061, "")])
+    assert start_list.correct("11999") == (None, None)
+    assert start_list.correct("abc") == (None, None)
@@ -1,19 +1,8 @@
-from ultralytics import YOLO
-import multiprocessing
+# เทรน YOLO (ค่าอยู่ในส่วน train ของ config)
+# เทียบเท่า: python -m bib train  (ส่ง --config / --set ต่อได้)
+import sys
 
-print(f"CPU cores available: {multiprocessing.cpu_count()}")
+from bib.cli import main
 
-# โหลดโมเดล
-model = YOLO('yolov8n.pt')
-
-# เริ่มเทรน
-model.train(
-    data='data.yaml',
-    epochs=50,
-    imgsz=640,
-    batch=16,  # ปรับจาก 166 เป็น 16
-    device='cpu',
-    workers=6,
-    name='bib_aug_yolo_default',
-    augment=True  # ใช้ default augmentation ของ YOLOv8
-)
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main([*sys.argv[1:], "train"]))